@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+from Fetch import IndicatorEngine as engine
+from Fetch.BarStore import load_panel
+from Fetch.IndicatorEngine import panel_arrays
+from Fetch.Manage_FAV import loadfave
+
+# ==================== Vectorized Backtest ====================
+# ทุกอย่างเป็น array (symbols x bars): สัญญาณ -> position -> ผลตอบแทนสุทธิ -> equity/drawdown/trade list
+# position ของแท่ง t ใช้สัญญาณของแท่ง t-1 (เข้า/ออกที่ราคาปิดของแท่งที่เกิดสัญญาณ ไม่มี look-ahead)
+# ค่าธรรมเนียม + slippage คิดเป็นสัดส่วนต่อการซื้อขาย 1 ขา (flip long -> short = 2 ขา)
+COMMISSION = 0.0015  # ~0.15% ต่อขา (ค่านายหน้าหุ้นไทยโดยประมาณ)
+SLIPPAGE = 0.0005
+BARS_PER_YEAR = 252
+
+TRADE_COLUMNS = ["symbol", "direction", "entry_date", "exit_date", "entry_price", "exit_price",
+                 "bars", "return", "open"]
+
+
+# ==================== Signals ====================
+# คืน target position (symbols x bars): 1 = long, -1 = short, 0 = ไม่ถือ (ช่วง warm-up เป็น 0)
+# ทุกตัวรับ high/low และ cache (อะไรก็ได้ที่มี get_or_load เช่น BarCache) เป็น keyword เหมือนกัน
+# cache ใช้เก็บเส้น indicator ที่หลายชุด parameter ใช้ซ้ำ (เช่นตอน optimize)
+def _line(cache, key, compute):
+    return compute() if cache is None else cache.get_or_load(key, compute)
+
+
+def _cross(fast_line, slow_line, short=False):
+    valid = ~np.isnan(fast_line) & ~np.isnan(slow_line)
+    above = fast_line > slow_line
+    signal = np.where(above, 1, -1 if short else 0).astype(np.int8)
+    signal[~valid] = 0
+    return signal
+
+
+def _hold(events):
+    # ffill ตามแกนเวลา: NaN = ไม่มีเหตุการณ์ ถือ position เดิมต่อ
+    T = events.shape[1]
+    idx = np.where(np.isnan(events), 0, np.arange(T))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    held = np.take_along_axis(events, idx, axis=1)
+    return np.nan_to_num(held).astype(np.int8)
+
+
+def ma_cross_signal(close, fast=20, slow=50, short=False, high=None, low=None, cache=None):
+    # กติกาเดียวกับ TFEX_Indicator.MA (MA20 > MA50 = ถือ)
+    fast_line = _line(cache, ("sma", fast), lambda: engine.sma(close, fast))
+    slow_line = _line(cache, ("sma", slow), lambda: engine.sma(close, slow))
+    return _cross(fast_line, slow_line, short)
+
+
+def ema_cross_signal(close, fast=12, slow=26, short=False, high=None, low=None, cache=None):
+    # กติกาเดียวกับ Prediction.detect_ema_cross (EMA12 > EMA26 = bullish)
+    fast_line = _line(cache, ("ema", fast), lambda: engine.ema(close, fast))
+    slow_line = _line(cache, ("ema", slow), lambda: engine.ema(close, slow))
+    return _cross(fast_line, slow_line, short)
+
+
+def rsi_signal(close, n=14, lower=30, upper=70, short=False, high=None, low=None, cache=None):
+    # mean reversion: เข้า long เมื่อ RSI < lower ถือจน RSI > upper (short=True จะกลับเป็น short ที่ upper)
+    value = _line(cache, ("rsi", n), lambda: engine.rsi(close, n))
+    events = np.full(value.shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        events[value < lower] = 1
+        events[value > upper] = -1 if short else 0
+    return _hold(events)
+
+
+def aroon_signal(close, n=14, short=False, high=None, low=None, cache=None):
+    # Aroon Up > Aroon Down = ขาขึ้น
+    high = close if high is None else high
+    low = close if low is None else low
+    down, up = _line(cache, ("aroon", n), lambda: engine.aroon(high, low, n))
+    return _cross(up, down, short)
+
+
+SIGNALS = {
+    "ma_cross": ma_cross_signal,
+    "ema_cross": ema_cross_signal,
+    "rsi": rsi_signal,
+    "aroon": aroon_signal,
+}
+
+
+# ==================== Engine ====================
+class BacktestResult:
+    def __init__(self, symbols, dates, close, position, returns, equity, trades):
+        self.symbols = list(symbols)
+        self.dates = pd.DatetimeIndex(dates)
+        self.close = close
+        self.position = position  # position ที่ถือจริงในแต่ละแท่ง
+        self.returns = returns    # ผลตอบแทนสุทธิต่อแท่ง (หลังค่าธรรมเนียม)
+        self.equity = equity
+        self.drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1.0
+        self.trades = trades
+        self.stats = self._stats()
+
+    def _stats(self):
+        T = len(self.dates)
+        years = max(T / BARS_PER_YEAR, 1e-9)
+        total = self.equity[:, -1] / self.equity[:, 0] - 1.0 if T else np.zeros(len(self.symbols))
+        mean = self.returns.mean(axis=1)
+        std = self.returns.std(axis=1)
+        closed = self.trades[~self.trades["open"]] if len(self.trades) else self.trades
+        per_symbol = closed.groupby("symbol")["return"] if len(closed) else None
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stats = pd.DataFrame({
+                "total_return": total,
+                "cagr": (1.0 + total) ** (1.0 / years) - 1.0,
+                "volatility": std * np.sqrt(BARS_PER_YEAR),
+                "sharpe": np.where(std > 0, mean / std * np.sqrt(BARS_PER_YEAR), np.nan),
+                "max_drawdown": self.drawdown.min(axis=1) if T else np.zeros(len(self.symbols)),
+                "exposure": (self.position != 0).mean(axis=1),
+            }, index=pd.Index(self.symbols, name="symbol"))
+        counts = self.trades.groupby("symbol").size() if len(self.trades) else pd.Series(dtype=int)
+        stats["trades"] = counts.reindex(stats.index, fill_value=0).astype(int)
+        if per_symbol is not None:
+            stats["win_rate"] = per_symbol.apply(lambda r: (r > 0).mean()).reindex(stats.index)
+            stats["avg_trade"] = per_symbol.mean().reindex(stats.index)
+        else:
+            stats["win_rate"] = np.nan
+            stats["avg_trade"] = np.nan
+        return stats
+
+    def equity_frame(self):
+        return pd.DataFrame(self.equity.T, index=self.dates, columns=self.symbols)
+
+    def drawdown_frame(self):
+        return pd.DataFrame(self.drawdown.T, index=self.dates, columns=self.symbols)
+
+    def portfolio(self):
+        """equity ของพอร์ตที่แบ่งเงินเท่ากันทุก symbol (rebalance ทุกแท่ง)"""
+        equity = pd.Series(np.cumprod(1.0 + self.returns.mean(axis=0)), index=self.dates, name="equity")
+        drawdown = equity / equity.cummax() - 1.0
+        return pd.DataFrame({"equity": equity, "drawdown": drawdown})
+
+
+def backtest_arrays(symbols, dates, close, signal, commission=COMMISSION, slippage=SLIPPAGE):
+    """close, signal: array (symbols x bars) คืน BacktestResult ที่คำนวณทั้ง universe พร้อมกัน"""
+    close = engine._as_2d(close)
+    dates = pd.DatetimeIndex(dates)
+    position, gross, growth = simulate(close, signal, commission, slippage)
+    equity = np.cumprod(growth, axis=1)
+    trades = _trades(symbols, dates, close, position, gross, commission + slippage)
+    return BacktestResult(symbols, dates, close, position, growth - 1.0, equity, trades)
+
+
+def simulate(close, signal, commission=COMMISSION, slippage=SLIPPAGE):
+    """คืน (position, gross, growth) ต่อแท่ง: growth = 1 + ผลตอบแทนสุทธิหลังค่าธรรมเนียม"""
+    close = engine._as_2d(close)
+    signal = np.atleast_2d(np.asarray(signal, dtype=np.float64))
+    S, T = close.shape
+    cost = commission + slippage
+
+    # position[t] = signal[t-1], ไม่ถือในแท่งที่ไม่มีราคา
+    position = np.zeros((S, T))
+    position[:, 1:] = np.nan_to_num(signal[:, :-1])
+    tradable = ~np.isnan(close)
+    tradable[:, 1:] &= ~np.isnan(close[:, :-1])
+    position[~tradable] = 0.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bar_ret = np.zeros((S, T))
+        bar_ret[:, 1:] = close[:, 1:] / close[:, :-1] - 1.0
+    bar_ret = np.where(tradable, bar_ret, 0.0)
+
+    turnover = np.abs(np.diff(position, axis=1, prepend=0.0))
+    gross = position * bar_ret
+    # (1 + gross) * (1 - cost)^turnover -> คิดแบบทวีคูณเพื่อให้ผลรวมของ trade ตรงกับ equity
+    growth = (1.0 + gross) * (1.0 - cost) ** turnover
+    return position, gross, growth
+
+
+def _trades(symbols, dates, close, position, gross, cost):
+    """แบ่ง position เป็นช่วงที่ค่าคงที่และไม่เป็น 0 -> 1 trade ต่อช่วง (vectorized ทั้ง matrix)"""
+    S, T = position.shape
+    if T == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    symbols = np.asarray(symbols, dtype=object)
+    padded = np.concatenate([np.zeros((S, 1)), position, np.zeros((S, 1))], axis=1)
+    changed = padded[:, 1:] != padded[:, :-1]  # changed[:, t] = position เปลี่ยนที่แท่ง t (t = T คือหลังแท่งสุดท้าย)
+    starts_r, starts_c = np.nonzero(changed[:, :T] & (position != 0))
+    ends_r, ends_c = np.nonzero(changed[:, 1:] & (position != 0))  # แท่งสุดท้ายของช่วง
+    # nonzero เรียงตาม (row, col) ทั้งคู่ และแต่ละช่วงมี start/end อย่างละ 1 จึงจับคู่ตามลำดับได้เลย
+    if len(starts_r) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    log_growth = np.concatenate([np.zeros((S, 1)), np.cumsum(np.log1p(gross), axis=1)], axis=1)
+    seg = np.exp(log_growth[starts_r, ends_c + 1] - log_growth[starts_r, starts_c])
+    is_open = ends_c == T - 1
+    seg = seg * (1.0 - cost) * np.where(is_open, 1.0, 1.0 - cost)
+
+    direction = position[starts_r, starts_c].astype(np.int8)
+    entry_idx = np.maximum(starts_c - 1, 0)  # เข้าที่ราคาปิดของแท่งที่เกิดสัญญาณ
+    trades = pd.DataFrame({
+        "symbol": symbols[starts_r],
+        "direction": direction,
+        "entry_date": dates[entry_idx],
+        "exit_date": dates[ends_c],
+        "entry_price": close[starts_r, entry_idx],
+        "exit_price": close[starts_r, ends_c],
+        "bars": ends_c - starts_c + 1,
+        "return": seg - 1.0,
+        "open": is_open,
+    })
+    return trades
+
+
+# ==================== Runners ====================
+def backtest_panel(panel, strategy="ma_cross", params=None, commission=COMMISSION, slippage=SLIPPAGE):
+    symbols, dates, arrays = panel_arrays(panel)
+    close = arrays["Close"]
+    signal = SIGNALS[strategy](close, high=arrays["High"], low=arrays["Low"], **(params or {}))
+    return backtest_arrays(symbols, dates, close, signal, commission=commission, slippage=slippage)
+
+
+def run(symbols, strategy="ma_cross", params=None, period="5y", commission=COMMISSION, slippage=SLIPPAGE):
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    panel = load_panel(symbols, period=period)
+    if panel.empty:
+        return None
+    return backtest_panel(panel, strategy=strategy, params=params, commission=commission, slippage=slippage)
+
+
+def run_watchlist(filepath, strategy="ma_cross", params=None, period="5y", commission=COMMISSION, slippage=SLIPPAGE):
+    return run(loadfave(filepath), strategy=strategy, params=params, period=period,
+               commission=commission, slippage=slippage)
@@ -0,0 +1,99 @@
+import time
+import threading
+from collections import OrderedDict
+
+# ==================== In-process Bar Cache ====================
+# cache ในหน่วยความจำที่ทุก indicator ใช้ร่วมกัน (TTL + LRU จำกัดจำนวนและขนาด)
+class BarCache:
+    def __init__(self, ttl=300, max_entries=512, max_bytes=256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, _, value = item
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        nbytes = _sizeof(value)
+        evicted_items = []
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            if nbytes > self.max_bytes:
+                return
+            self._items[key] = (time.monotonic() + self.ttl, nbytes, value)
+            self._bytes += nbytes
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                _, _, evicted = self._items[oldest]
+                self._drop(oldest)
+                self.evictions += 1
+                evicted_items.append((oldest, evicted))
+        # hook ของ subclass (เช่น spill ลงดิสก์) รันนอก lock ไม่ให้ I/O บล็อกผู้อ่าน cache คนอื่น
+        for old_key, evicted in evicted_items:
+            self._on_evict(old_key, evicted)
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._items.clear()
+                self._bytes = 0
+            elif key in self._items:
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+            }
+
+    def _on_evict(self, key, value):
+        pass
+
+    def _drop(self, key):
+        _, nbytes, _ = self._items.pop(key)
+        self._bytes -= nbytes
+
+
+def _sizeof(value):
+    if isinstance(value, (tuple, list)):
+        return sum(_sizeof(v) for v in value)
+    try:
+        return int(value.memory_usage(index=True, deep=False).sum())
+    except AttributeError:
+        return int(getattr(value, "nbytes", 0))
+
+
+bar_cache = BarCache()
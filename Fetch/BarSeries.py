@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# ==================== Compact Bar Series ====================
+# OHLCV เป็น NumPy array ต่อเนื่อง + timestamp int64 (ns, UTC) ใช้แทน DataFrame ใน hot path ของ indicator
+# แปลงกลับเป็น pandas เฉพาะตอนแสดงผล (to_frame / dates)
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class BarSeries:
+    __slots__ = ("symbol", "ts", "open", "high", "low", "close", "volume", "tz")
+
+    def __init__(self, symbol, ts, open, high, low, close, volume, tz=""):
+        self.symbol = symbol
+        self.ts = np.ascontiguousarray(ts, dtype=np.int64)
+        self.open = np.ascontiguousarray(open)
+        self.high = np.ascontiguousarray(high)
+        self.low = np.ascontiguousarray(low)
+        self.close = np.ascontiguousarray(close)
+        self.volume = np.ascontiguousarray(volume)
+        self.tz = tz
+
+    @classmethod
+    def from_frame(cls, symbol, df, dtype=np.float64):
+        if "Date" in df.columns or "Datetime" in df.columns:
+            df = df.set_index("Date" if "Date" in df.columns else "Datetime")
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else ""
+        return cls(
+            symbol,
+            index.as_unit("ns").asi8,
+            df["Open"].to_numpy(dtype=dtype),
+            df["High"].to_numpy(dtype=dtype),
+            df["Low"].to_numpy(dtype=dtype),
+            df["Close"].to_numpy(dtype=dtype),
+            df["Volume"].to_numpy(dtype=dtype),
+            tz=tz,
+        )
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, key):
+        # slice คืน view ไม่ copy ข้อมูล
+        if not isinstance(key, slice):
+            raise TypeError("BarSeries only supports slicing")
+        return BarSeries(self.symbol, self.ts[key], self.open[key], self.high[key],
+                         self.low[key], self.close[key], self.volume[key], tz=self.tz)
+
+    def tail(self, n):
+        return self[-n:] if n > 0 else self[len(self):]
+
+    def astype(self, dtype):
+        return BarSeries(self.symbol, self.ts, *(getattr(self, f).astype(dtype, copy=False) for f in FIELDS), tz=self.tz)
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + sum(getattr(self, f).nbytes for f in FIELDS)
+
+    @property
+    def last_ts(self):
+        return int(self.ts[-1]) if len(self.ts) else None
+
+    # ---------- display edge ----------
+    def dates(self):
+        index = pd.to_datetime(self.ts, utc=True)
+        index = index.tz_convert(self.tz) if self.tz else index.tz_convert(None)
+        index.name = "Date"
+        return index
+
+    def to_frame(self, reset_index=False):
+        df = pd.DataFrame({
+            "Open": self.open,
+            "High": self.high,
+            "Low": self.low,
+            "Close": self.close,
+            "Volume": self.volume,
+        }, index=self.dates())
+        return df.reset_index() if reset_index else df
+
+    def __repr__(self):
+        return f"BarSeries({self.symbol!r}, bars={len(self)})"
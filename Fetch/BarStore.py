@@ -0,0 +1,286 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from Fetch.Provider import get_provider
+from Fetch.Scheduler import get_scheduler
+
+# ==================== Local OHLCV Store ====================
+# เก็บแท่งราคาไว้บนดิสก์แบบ columnar (1 ไฟล์ .npz ต่อ symbol/interval, 1 array ต่อคอลัมน์)
+# แล้วดึงจาก provider เฉพาะแท่งที่ใหม่กว่า timestamp ล่าสุดที่มีอยู่
+STORE_DIR = os.path.join("Data", "bars")
+REFRESH_SECONDS = 15 * 60  # ไม่ยิง network ซ้ำถ้าเพิ่งอัปเดตไปไม่ถึง 15 นาที
+
+_MIN_TS = np.iinfo(np.int64).min
+
+_PERIODS = {
+    "1d": relativedelta(days=1),
+    "5d": relativedelta(days=5),
+    "1mo": relativedelta(months=1),
+    "3mo": relativedelta(months=3),
+    "6mo": relativedelta(months=6),
+    "1y": relativedelta(years=1),
+    "2y": relativedelta(years=2),
+    "5y": relativedelta(years=5),
+    "10y": relativedelta(years=10),
+}
+
+
+def period_start(period, end=None):
+    end = end or datetime.today()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime(end.year, 1, 1)
+    if period not in _PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+    return end - _PERIODS[period]
+
+
+def _store_path(symbol, interval):
+    safe = symbol.upper().replace("/", "_").replace("\\", "_")
+    return os.path.join(STORE_DIR, get_provider().name, interval, f"{safe}.npz")
+
+
+def _to_ns(value, tz):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None and tz:
+        ts = ts.tz_localize(tz)
+    elif ts.tzinfo is not None and not tz:
+        ts = ts.tz_convert(None)
+    return ts.as_unit("ns").value
+
+
+# ==================== Read / Write ====================
+def read_bars(symbol, interval="1d"):
+    path = _store_path(symbol, interval)
+    if not os.path.exists(path):
+        return None, None
+    with np.load(path, allow_pickle=False) as npz:
+        meta = {
+            "tz": str(npz["_tz"]),
+            "index_name": str(npz["_index_name"]),
+            "covered_from": int(npz["_covered_from"]),
+            "fetched_at": float(npz["_fetched_at"]),
+        }
+        columns = [str(c) for c in npz["_columns"]]
+        data = {c: npz[f"col_{i}"] for i, c in enumerate(columns)}
+        index = pd.to_datetime(npz["_ts"], utc=True)
+    index = index.tz_convert(meta["tz"]) if meta["tz"] else index.tz_convert(None)
+    index.name = meta["index_name"]
+    return pd.DataFrame(data, index=index, columns=columns), meta
+
+
+def write_bars(symbol, interval, df, covered_from, fetched_at=None):
+    path = _store_path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    index = df.index
+    tz = str(index.tz) if index.tz is not None else ""
+    ts = index.tz_convert("UTC") if index.tz is not None else index
+    arrays = {f"col_{i}": df[c].to_numpy() for i, c in enumerate(df.columns)}
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        _ts=ts.as_unit("ns").asi8,
+        _tz=np.array(tz),
+        _index_name=np.array(index.name or "Date"),
+        _columns=np.array([str(c) for c in df.columns]),
+        _covered_from=np.array(covered_from, dtype=np.int64),
+        _fetched_at=np.array(fetched_at if fetched_at is not None else time.time()),
+        **arrays,
+    )
+    os.replace(tmp_path, path)
+
+
+def _merge(old, new):
+    if old is None or old.empty:
+        return new
+    if new is None or new.empty:
+        return old
+    if old.index.tz is not None:
+        new = new.tz_convert(old.index.tz) if new.index.tz is not None else new.tz_localize(old.index.tz)
+    elif new.index.tz is not None:
+        new = new.tz_localize(None)
+    merged = pd.concat([old, new])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+def _download(symbol, interval, start=None, end=None):
+    key = ("history", symbol.upper(), interval, str(start), str(end))
+    return get_scheduler().call(key, get_provider().history, symbol, start=start, end=end, interval=interval)
+
+
+# ==================== Public API ====================
+def load_history(symbol, period="1y", interval="1d", start=None, end=None):
+    """คืน DataFrame แบบเดียวกับ yf.Ticker().history() โดยอ่านจาก store และดึงเพิ่มเฉพาะส่วนที่ขาด"""
+    if start is None and period is not None:
+        start = period_start(period)
+
+    stored, meta = read_bars(symbol, interval)
+    now = time.time()
+
+    if stored is None:
+        fresh = _download(symbol, interval, start=start)
+        if fresh is None or fresh.empty:
+            return fresh
+        tz = str(fresh.index.tz) if fresh.index.tz is not None else ""
+        covered_from = _MIN_TS if start is None else _to_ns(start, tz)
+        write_bars(symbol, interval, fresh, covered_from, now)
+        return _slice(fresh, start, end)
+
+    tz = meta["tz"]
+    covered_from = meta["covered_from"]
+    fetched_at = meta["fetched_at"]  # เลื่อนเฉพาะเมื่อดึงแท่งล่าสุด (backfill อย่างเดียวไม่นับเป็นการ refresh)
+    changed = False
+
+    # backfill ช่วงเก่าที่ยังไม่เคยดึง
+    want_from = _MIN_TS if start is None else _to_ns(start, tz)
+    if want_from < covered_from:
+        older_end = pd.Timestamp(covered_from, tz="UTC").tz_convert(tz or None).to_pydatetime()
+        older = _download(symbol, interval, start=start, end=older_end)
+        stored = _merge(stored, older)
+        covered_from = want_from
+        changed = True
+
+    # delta: ดึงตั้งแต่แท่งล่าสุด (รวมแท่งล่าสุดเพื่ออัปเดตแท่งที่ยังไม่ปิด)
+    if now - meta["fetched_at"] >= REFRESH_SECONDS and not stored.empty:
+        last = stored.index[-1]
+        delta_start = last.normalize() if interval.endswith(("d", "wk", "mo")) else last
+        newer = _download(symbol, interval, start=delta_start.to_pydatetime())
+        stored = _merge(stored, newer)
+        fetched_at = now
+        changed = True
+
+    if changed:
+        write_bars(symbol, interval, stored, covered_from, fetched_at)
+    return _slice(stored, start, end)
+
+
+
+# ==================== Warm-up ====================
+_DAYS_PER_BAR = {"1d": 7 / 5, "5d": 7, "1wk": 7, "1mo": 31, "3mo": 92}
+
+
+def load_with_warmup(symbol, start, end=None, warmup=0, interval="1d"):
+    """โหลดช่วง [start, end) พร้อมแท่งก่อน start อีก warmup แท่งสำหรับ rolling window
+    คืน (df, first) โดย df.iloc[first:] คือช่วงที่ขอจริง (ถ้าหุ้นเพิ่งเข้าตลาด warm-up อาจได้ไม่ครบ)"""
+    start = pd.Timestamp(start)
+    # เผื่อวันหยุดตามปฏิทินไว้ ~10 วัน ถ้ายังไม่พอค่อยถอยเพิ่มเป็นเท่าตัว (ส่วนที่ดึงแล้วอยู่ใน store)
+    lookback = int(np.ceil(warmup * _DAYS_PER_BAR.get(interval, 1))) + 10 if warmup > 0 else 0
+    df, before = None, -1
+    for _ in range(4):
+        df = load_history(symbol, period=None, interval=interval,
+                          start=(start - pd.Timedelta(days=lookback)).to_pydatetime(), end=end)
+        if df is None or df.empty:
+            return df, 0
+        tz = str(df.index.tz) if df.index.tz is not None else ""
+        first = int(np.searchsorted(df.index.as_unit("ns").asi8, _to_ns(start, tz)))
+        if first >= warmup or first == before:
+            break
+        before = first
+        lookback *= 2
+    return df.iloc[max(first - warmup, 0):], min(first, warmup)
+
+# ==================== Batched Download ====================
+def _download_batch(symbols, interval, start=None):
+    key = ("download", tuple(symbols), interval, str(start))
+    # batch download เป็นทางเดียวที่ได้ผลว่างปลอมตอนโดน throttle จึงเปิด retry_empty เฉพาะที่นี่
+    return get_scheduler().call(key, get_provider().download, symbols, start=start, interval=interval,
+                                retry_empty=True)
+
+
+def load_many(symbols, period="1y", interval="1d", start=None):
+    """โหลดหลาย symbol พร้อมกัน: ตัวที่ต้องยิง network จะถูกรวมเป็น provider.download ไม่เกิน 2 request"""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if start is None and period is not None:
+        start = period_start(period)
+    now = time.time()
+
+    stored = {}
+    missing, stale = [], []
+    for symbol in symbols:
+        df, meta = read_bars(symbol, interval)
+        if df is None or df.empty:
+            missing.append(symbol)
+            continue
+        want_from = _MIN_TS if start is None else _to_ns(start, meta["tz"])
+        if want_from < meta["covered_from"]:
+            missing.append(symbol)
+        elif now - meta["fetched_at"] >= REFRESH_SECONDS:
+            stale.append(symbol)
+        stored[symbol] = (df, meta)
+
+    if missing:
+        fresh = _download_batch(missing, interval, start=start)
+        for symbol in missing:
+            old, meta = stored.get(symbol, (None, None))
+            new = fresh.get(symbol)
+            if new is None:
+                continue
+            merged = _merge(old, new)
+            tz = str(merged.index.tz) if merged.index.tz is not None else ""
+            covered_from = _MIN_TS if start is None else _to_ns(start, tz)
+            write_bars(symbol, interval, merged, covered_from, now)
+            stored[symbol] = (merged, {"covered_from": covered_from})
+
+    if stale:
+        delta_start = min(stored[s][0].index[-1].tz_localize(None) for s in stale).normalize()
+        fresh = _download_batch(stale, interval, start=delta_start.to_pydatetime())
+        for symbol in stale:
+            old, meta = stored[symbol]
+            merged = _merge(old, fresh.get(symbol))
+            write_bars(symbol, interval, merged, meta["covered_from"], now)
+            stored[symbol] = (merged, meta)
+
+    return {symbol: _slice(stored[symbol][0], start, None) for symbol in symbols if symbol in stored}
+
+
+def load_panel(symbols, period="1y", interval="1d", start=None, fields=("Open", "High", "Low", "Close", "Volume")):
+    """คืน panel ที่ align วันที่แล้ว: columns เป็น MultiIndex (field, symbol) แบบ yf.download"""
+    return frames_to_panel(load_many(symbols, period=period, interval=interval, start=start), fields)
+
+
+def frames_to_panel(frames, fields=("Open", "High", "Low", "Close", "Volume")):
+    """dict symbol -> DataFrame (จาก load_many) เป็น panel แบบ load_panel โดยไม่อ่าน store ซ้ำ"""
+    if not frames:
+        return pd.DataFrame()
+    aligned = {}
+    for symbol, df in frames.items():
+        df = df[[f for f in fields if f in df.columns]]
+        if df.index.tz is not None:
+            df = df.tz_localize(None)
+        aligned[symbol] = df
+    panel = pd.concat(aligned, axis=1).sort_index()
+    panel = panel.swaplevel(0, 1, axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    panel.columns.names = ["Price", "Ticker"]
+    return panel
+
+
+def _slice(df, start, end):
+    if df is None or df.empty:
+        return df
+    tz = str(df.index.tz) if df.index.tz is not None else ""
+    mask = np.ones(len(df), dtype=bool)
+    ts = df.index.as_unit("ns").asi8
+    if start is not None:
+        mask &= ts >= _to_ns(start, tz)
+    if end is not None:
+        mask &= ts < _to_ns(end, tz)
+    return df[mask].copy()
+
+
+def clear_store(symbol=None, interval="1d"):
+    if symbol is None:
+        folder = os.path.join(STORE_DIR, get_provider().name, interval)
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                os.remove(os.path.join(folder, name))
+        return
+    path = _store_path(symbol, interval)
+    if os.path.exists(path):
+        os.remove(path)
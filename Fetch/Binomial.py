@@ -0,0 +1,139 @@
+import math
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.special import gammaln
+except ImportError:  # ไม่มี scipy ก็ใช้ math.lgamma ทีละค่า (ช้ากว่าแต่ได้ค่าเดียวกัน)
+    gammaln = np.vectorize(math.lgamma, otypes=[np.float64])
+from Fetch.BarStore import load_panel
+from Fetch.IndicatorEngine import panel_arrays
+
+# ==================== Binomial Lattice (CRR) ====================
+# ทุกฟังก์ชันรับ spot/sigma/... เป็น array ยาวเท่าจำนวน symbol แล้วคำนวณทั้ง batch พร้อมกัน (symbols x nodes)
+# การกระจายราคา ณ วันสุดท้ายใช้สูตรปิดของ binomial (log pmf ผ่าน gammaln) ไม่ต้องเดิน lattice ทีละชั้น
+# จึงใช้หลายพัน step ได้ ส่วน American option ต้องย้อน lattice แต่ละชั้นเป็น operation เดียวบนทุก symbol
+TRADING_DAYS = 252
+RISK_FREE = 0.02  # ต่อปี
+STEPS = 1000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def estimate_volatility(close, lookback=TRADING_DAYS):
+    """close: array (symbols x bars) คืน (sigma, drift) ต่อปีจาก log return ช่วง lookback ล่าสุด"""
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ret = np.diff(np.log(close[:, -(lookback + 1):]), axis=1)
+    sigma = np.nanstd(log_ret, axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    # drift ของราคา (arithmetic) = mean(log return) + sigma^2 / 2
+    drift = np.nanmean(log_ret, axis=1) * TRADING_DAYS + 0.5 * sigma ** 2
+    return sigma, drift
+
+
+def lattice(sigma, years, steps, drift):
+    """คืน (u, d, p) ต่อ symbol สำหรับ step ขนาด years / steps"""
+    sigma = np.asarray(sigma, dtype=np.float64)
+    dt = np.asarray(years, dtype=np.float64) / steps
+    u = np.exp(sigma * np.sqrt(dt))
+    d = 1.0 / u
+    p = (np.exp(np.asarray(drift, dtype=np.float64) * dt) - d) / (u - d)
+    return u, d, np.clip(p, 1e-12, 1.0 - 1e-12)
+
+
+def _nodes(spot, u, steps):
+    # ราคาที่ node k (ขึ้น k ครั้ง ลง steps-k ครั้ง) = spot * u^(2k - steps) เพราะ d = 1/u
+    k = np.arange(steps + 1)
+    return np.asarray(spot, dtype=np.float64)[:, np.newaxis] * np.power(u[:, np.newaxis], 2 * k - steps)
+
+
+def terminal_distribution(spot, sigma, years, steps=STEPS, drift=0.0):
+    """คืน (prices, probs) ขนาด (symbols x steps+1) เรียงราคาจากน้อยไปมาก"""
+    spot = np.atleast_1d(np.asarray(spot, dtype=np.float64))
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=np.float64), spot.shape)
+    u, _, p = lattice(sigma, np.broadcast_to(years, spot.shape), steps, np.broadcast_to(drift, spot.shape))
+    k = np.arange(steps + 1)
+    log_comb = gammaln(steps + 1) - gammaln(k + 1) - gammaln(steps - k + 1)
+    log_pmf = log_comb + k * np.log(p)[:, np.newaxis] + (steps - k) * np.log1p(-p)[:, np.newaxis]
+    return _nodes(spot, u, steps), np.exp(log_pmf)
+
+
+def distribution_stats(prices, probs, spot=None, percentiles=PERCENTILES):
+    """ค่าคาดหวัง, percentile และความน่าจะเป็นที่ราคาขึ้น ต่อ symbol"""
+    stats = {"expected": (prices * probs).sum(axis=1)}
+    cdf = np.cumsum(probs, axis=1)
+    rows = np.arange(len(prices))
+    for q in percentiles:
+        idx = (cdf >= q / 100.0).argmax(axis=1)
+        stats[f"p{q}"] = prices[rows, idx]
+    if spot is not None:
+        stats["prob_up"] = (probs * (prices > np.asarray(spot)[:, np.newaxis])).sum(axis=1)
+    return stats
+
+
+# ==================== Options ====================
+def _payoff(prices, strike, kind):
+    strike = np.asarray(strike, dtype=np.float64)
+    strike = strike[:, np.newaxis] if strike.ndim else strike
+    return np.maximum(prices - strike, 0.0) if kind == "call" else np.maximum(strike - prices, 0.0)
+
+
+def european(spot, strike, sigma, years, rate=RISK_FREE, steps=STEPS, kind="call", dividend=0.0):
+    """ราคา European option ของทุก symbol จากการกระจายแบบ risk-neutral ณ วันหมดอายุ"""
+    spot = np.atleast_1d(np.asarray(spot, dtype=np.float64))
+    prices, probs = terminal_distribution(spot, sigma, years, steps, drift=np.asarray(rate) - dividend)
+    return np.exp(-np.asarray(rate) * np.asarray(years)) * (probs * _payoff(prices, strike, kind)).sum(axis=1)
+
+
+def american(spot, strike, sigma, years, rate=RISK_FREE, steps=STEPS, kind="call", dividend=0.0):
+    """ราคา American option: ย้อน lattice ทีละชั้น (แต่ละชั้นคำนวณทุก symbol และทุก node พร้อมกัน)"""
+    spot = np.atleast_1d(np.asarray(spot, dtype=np.float64))
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=np.float64), spot.shape)
+    years = np.broadcast_to(np.asarray(years, dtype=np.float64), spot.shape)
+    u, _, p = lattice(sigma, years, steps, np.broadcast_to(np.asarray(rate) - dividend, spot.shape))
+    disc = np.exp(-np.asarray(rate) * years / steps)[:, np.newaxis]
+    p = p[:, np.newaxis]
+    nodes = _nodes(spot, u, steps)
+    value = _payoff(nodes, strike, kind)
+    u = u[:, np.newaxis]
+    for _ in range(steps):
+        # ราคาชั้นก่อนหน้า: node k ของชั้น j = node k ของชั้น j+1 คูณ u
+        nodes = nodes[:, :-1] * u
+        value = np.maximum(disc * (p * value[:, 1:] + (1.0 - p) * value[:, :-1]), _payoff(nodes, strike, kind))
+    return value[:, 0]
+
+
+# ==================== From price history ====================
+def _history(symbols, period):
+    symbols = [symbols.upper()] if isinstance(symbols, str) else [s.upper() for s in symbols]
+    panel = load_panel(symbols, period=period)
+    if panel.empty:
+        return [], None
+    symbols, _, arrays = panel_arrays(panel)
+    return symbols, arrays["Close"]
+
+
+def forecast(symbols, days=30, steps=STEPS, period="1y", percentiles=PERCENTILES):
+    """ราคาคาดการณ์อีก days วันทำการของทุก symbol (sigma/drift จากประวัติใน store)"""
+    symbols, close = _history(symbols, period)
+    if not symbols:
+        return pd.DataFrame()
+    spot = close[:, -1]
+    sigma, drift = estimate_volatility(close)
+    prices, probs = terminal_distribution(spot, sigma, days / TRADING_DAYS, steps, drift)
+    table = pd.DataFrame({"spot": spot, "sigma": sigma, "drift": drift}, index=pd.Index(symbols, name="symbol"))
+    for name, values in distribution_stats(prices, probs, spot, percentiles).items():
+        table[name] = values
+    return table
+
+
+def option_price(symbols, strike, days, kind="call", style="european", rate=RISK_FREE, steps=STEPS,
+                 period="1y", dividend=0.0):
+    """มูลค่า option บน underlying (เช่น SET50 สำหรับ TFEX) โดยใช้ volatility จากประวัติ
+    strike: ตัวเลขเดียวหรือ array ตามจำนวน symbol"""
+    symbols, close = _history(symbols, period)
+    if not symbols:
+        return pd.Series(dtype=float)
+    sigma, _ = estimate_volatility(close)
+    pricer = american if style == "american" else european
+    values = pricer(close[:, -1], strike, sigma, days / TRADING_DAYS, rate, steps, kind, dividend)
+    return pd.Series(values, index=pd.Index(symbols, name="symbol"), name=f"{style}_{kind}")
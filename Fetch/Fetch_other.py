@@ -1,10 +1,9 @@
-import yfinance as yf
+from Fetch.BarStore import load_history
 
 def fetch_other_asset(symbol):
 
     try:
-        asset_data = yf.Ticker(symbol)
-        hist = asset_data.history(period="max")
+        hist = load_history(symbol, period="max")
         return hist
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+import torch
+import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
+from Fetch.Manage_FAV import loadfave
+from Fetch.Prediction import (
+    fetch_series, global_inputs, global_stale_reason, load_global_model, train_global_model,
+)
+
+# ==================== Multi-horizon Forecast ====================
+# พยากรณ์ราคาปิด 1..horizon วันทำการของทุก symbol พร้อมกัน ด้วย global model (normalize ต่อ symbol)
+#   direct  : โมเดลหัว multi-output (GlobalPriceModel(horizon=H)) -> forward ครั้งเดียวได้ทุก horizon
+#   rollout : โมเดล 1 วัน ป้อนผลกลับเป็น input ทีละวัน ทุก symbol เป็น batch เดียว (H forward ไม่วนต่อ symbol)
+#             window เลื่อนอยู่ใน tensor ตลอด แปลงเป็น numpy ครั้งเดียวตอนจบ
+# ช่วงความเชื่อมั่น: quantile ของ error ต่อ horizon จากการพยากรณ์ย้อนหลัง CALIBRATION จุดล่าสุดของ symbol นั้น
+# (รวมอยู่ใน batch เดียวกับการพยากรณ์จริง) โมเดลถูก train โดยกัน CALIBRATION + horizon แท่งล่าสุดไว้
+# error จึงเป็น out-of-sample; โมเดลเก่าเกิน MAX_AGE, มีแท่งใหม่เกิน MAX_NEW_BARS หรือไม่รู้จัก symbol ที่ขอ
+# จะถูก train ใหม่ (checkpoint แยกจาก Prediction.predict_next_prices ซึ่ง train แบบไม่กัน holdout)
+HORIZON = 30
+CALIBRATION = 60
+LEVELS = (0.05, 0.95)
+DIRECT_MODEL_PATH = "Model/global_horizon_model.pt"
+ROLLOUT_MODEL_PATH = "Model/global_rollout_model.pt"
+MAX_NEW_BARS = 5  # แท่งใหม่ที่ยอมให้ก่อน train ใหม่ (train global ทั้งชุด จึงไม่ทำทุกวัน)
+HISTORY_BARS = 120  # จำนวนแท่งย้อนหลังที่เก็บไว้วาดกราฟ
+
+
+# ==================== Batched prediction ====================
+def rollout(model, x, ids, horizon):
+    """x: tensor (N x window) คืน tensor (N x horizon) จากการป้อนผลกลับทีละวัน"""
+    out = torch.empty((len(x), horizon), dtype=x.dtype)
+    window = x
+    with torch.no_grad():
+        for h in range(horizon):
+            step = model(window, ids)[:, :1]
+            out[:, h] = step[:, 0]
+            window = torch.cat([window[:, 1:], step], dim=1)
+    return out
+
+
+def direct(model, x, ids, horizon):
+    with torch.no_grad():
+        return model(x, ids)[:, :horizon]
+
+
+METHODS = {"direct": direct, "rollout": rollout}
+
+
+def _origins(series, window_size, horizon, calibration):
+    """window ของจุดย้อนหลัง (พร้อมราคาจริง horizon วันถัดไป) + window ล่าสุด ต่อ symbol"""
+    calibration = max(min(calibration, len(series) - window_size - horizon + 1), 0)
+    if calibration:
+        segment = series[-(calibration + window_size + horizon - 1):]
+        windows = sliding_window_view(segment, window_size)[:calibration]
+        actual = sliding_window_view(segment[window_size:], horizon)[:calibration]
+    else:
+        windows = np.zeros((0, window_size))
+        actual = np.zeros((0, horizon))
+    return np.concatenate([windows, series[np.newaxis, -window_size:]]), actual
+
+
+class MultiHorizonForecast:
+    def __init__(self, symbols, dates, last_close, mean, lower, upper, levels, method, history):
+        self.symbols = list(symbols)
+        self.dates = pd.DatetimeIndex(dates)  # วันทำการในอนาคต 1..horizon
+        self.last_close = last_close          # (symbols,)
+        self.mean = mean                      # (symbols x horizon)
+        self.lower = lower
+        self.upper = upper
+        self.levels = levels
+        self.method = method
+        self.history = history                # symbol -> Series ราคาปิดย้อนหลัง (ใช้วาดกราฟ)
+
+    @property
+    def horizon(self):
+        return self.mean.shape[1]
+
+    def frame(self):
+        """ตารางแบบยาว: symbol, date, horizon, forecast, lower, upper"""
+        S, H = self.mean.shape
+        return pd.DataFrame({
+            "symbol": np.repeat(self.symbols, H),
+            "date": np.tile(self.dates, S),
+            "horizon": np.tile(np.arange(1, H + 1), S),
+            "forecast": self.mean.ravel(),
+            "lower": self.lower.ravel(),
+            "upper": self.upper.ravel(),
+        })
+
+    def table(self, horizon=None):
+        """ราคาคาดการณ์ ณ horizon เดียวของทุก symbol พร้อม % เปลี่ยนจากราคาล่าสุด"""
+        h = (horizon or self.horizon) - 1
+        table = pd.DataFrame({
+            "last_close": self.last_close,
+            "forecast": self.mean[:, h],
+            "lower": self.lower[:, h],
+            "upper": self.upper[:, h],
+        }, index=pd.Index(self.symbols, name="symbol"))
+        table["change_pct"] = (table["forecast"] / table["last_close"] - 1.0) * 100
+        return table
+
+    def plot(self, symbols=None, cols=3, show=True):
+        symbols = self.symbols if symbols is None else [s for s in symbols if s in self.symbols]
+        if not symbols:
+            return None
+        rows = -(-len(symbols) // cols)
+        fig, axes = plt.subplots(rows, min(cols, len(symbols)), figsize=(5 * min(cols, len(symbols)), 3 * rows),
+                                 squeeze=False)
+        for ax, symbol in zip(axes.ravel(), symbols):
+            i = self.symbols.index(symbol)
+            history = self.history[symbol]
+            ax.plot(history.index, history.to_numpy(), label="Close")
+            ax.plot(self.dates, self.mean[i], color="red", label="Forecast")
+            ax.fill_between(self.dates, self.lower[i], self.upper[i], color="red", alpha=0.2,
+                            label=f"{self.levels[0]:.0%}-{self.levels[1]:.0%}")
+            ax.set_title(symbol)
+            ax.grid(True)
+        for ax in axes.ravel()[len(symbols):]:
+            ax.axis("off")
+        axes[0, 0].legend(loc="upper left")
+        fig.suptitle(f"{self.horizon}-day forecast ({self.method})")
+        fig.tight_layout()
+        if show:
+            plt.show()
+        return fig
+
+
+# ==================== Models ====================
+def stale_reason(meta, symbols, need, holdout, period="1y"):
+    """เหตุผลที่ต้อง train ใหม่ หรือ None"""
+    if meta is not None and meta.get("horizon", 1) < need:
+        return "horizon too short"
+    if meta is not None and meta.get("holdout", 0) < holdout:
+        return "calibration bars seen in training"
+    return global_stale_reason(meta, symbols, period, max_new_bars=MAX_NEW_BARS)
+
+
+def load_model(method="direct", horizon=HORIZON, symbols=None, path=None, calibration=CALIBRATION, period="1y"):
+    """โหลดโมเดลตาม method แล้ว train ใหม่ด้วย symbols ที่ให้มาถ้ายังไม่มี, หัว direct สั้นกว่า horizon,
+    ช่วง calibration ไม่ได้ถูกกันออก หรือโมเดล stale"""
+    path = path or (DIRECT_MODEL_PATH if method == "direct" else ROLLOUT_MODEL_PATH)
+    model, meta = load_global_model(path)
+    need = horizon if method == "direct" else 1
+    holdout = calibration + horizon
+    reason = stale_reason(meta, symbols, need, holdout, period)
+    if reason is not None:
+        if not symbols:
+            if model is not None and meta.get("horizon", 1) >= need:
+                return model, meta
+            raise ValueError("No trained model found and no symbols to train on")
+        print(f"🔁 Training forecast model: {reason}")
+        known = meta["symbols"] if meta else []
+        model, meta = train_global_model(list(dict.fromkeys(known + symbols)), path=path,
+                                         horizon=max(need, HORIZON) if need > 1 else 1, holdout=holdout)
+    return model, meta
+
+
+def forecast(symbols, horizon=HORIZON, method="direct", period="1y", levels=LEVELS,
+             calibration=CALIBRATION, path=None):
+    """คืน MultiHorizonForecast ของทุก symbol ที่มีข้อมูลพอ"""
+    symbols = [symbols.upper()] if isinstance(symbols, str) else [s.upper() for s in symbols]
+    model, meta = load_model(method, horizon, symbols, path, calibration, period)
+    window_size = meta["window_size"]
+    names, series, ids, lows, spans = global_inputs(symbols, meta, period, min_bars=window_size)
+    if not names:
+        return None
+
+    # ทุก symbol: จุดย้อนหลังสำหรับวัด error + window ล่าสุด -> batch เดียว
+    blocks = [_origins(s, window_size, horizon, calibration) for s in series]
+    counts = np.array([len(windows) for windows, _ in blocks])
+    x = torch.from_numpy(np.concatenate([windows for windows, _ in blocks]).astype(np.float32))
+    batch_ids = torch.from_numpy(np.repeat(np.asarray(ids, dtype=np.int64), counts))
+    pred = METHODS[method](model, x, batch_ids, horizon).numpy().astype(np.float64)
+
+    ends = np.cumsum(counts)
+    mean = pred[ends - 1]
+    lower = np.full_like(mean, np.nan)
+    upper = np.full_like(mean, np.nan)
+    for i, (start, end) in enumerate(zip(ends - counts, ends - 1)):
+        actual = blocks[i][1]
+        if len(actual):
+            error = actual - pred[start:end]
+            low_q, high_q = np.quantile(error, levels, axis=0)
+            lower[i] = mean[i] + low_q
+            upper[i] = mean[i] + high_q
+
+    scale = spans[:, np.newaxis]
+    base = lows[:, np.newaxis]
+    history, last_dates = {}, []
+    for symbol in names:
+        bars = fetch_series(symbol, period).tail(HISTORY_BARS)
+        history[symbol] = pd.Series(bars.close, index=bars.dates(), name=symbol)
+        last_dates.append(history[symbol].index[-1])
+    last = max(last_dates)
+    dates = pd.bdate_range(last + pd.offsets.BDay(1), periods=horizon, tz=last.tz)
+    last_close = np.array([history[s].iloc[-1] for s in names])
+    return MultiHorizonForecast(names, dates, last_close, mean * scale + base, lower * scale + base,
+                                upper * scale + base, levels, method, history)
+
+
+def forecast_watchlist(filepath, horizon=HORIZON, method="direct", period="1y", levels=LEVELS):
+    return forecast(loadfave(filepath), horizon=horizon, method=method, period=period, levels=levels)
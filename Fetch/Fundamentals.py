@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import threading
+import pandas as pd
+from Fetch.Provider import get_provider
+from Fetch.Scheduler import get_scheduler
+
+# ==================== Fundamentals Cache ====================
+# PEG และงบการเงินเปลี่ยนแค่รายไตรมาส จึงเก็บลงดิสก์พร้อมเวลาที่ดึง แล้วหมดอายุแยกตาม field
+CACHE_DIR = os.path.join("Data", "fundamentals")
+DAY = 24 * 60 * 60
+MAX_AGE = {
+    "peg_ratio": 1 * DAY,
+    "financials": 30 * DAY,
+    "balance_sheet": 30 * DAY,
+    "cashflow": 30 * DAY,
+}
+MISSING_MAX_AGE = 6 * 60 * 60  # ค่าที่หาไม่เจอให้ลองใหม่เร็วกว่า
+STATEMENTS = ("financials", "balance_sheet", "cashflow")
+
+_lock = threading.Lock()
+
+
+def _folder():
+    return os.path.join(CACHE_DIR, get_provider().name)
+
+
+def _index_path(symbol):
+    return os.path.join(_folder(), f"{symbol.upper()}.json")
+
+
+def _frame_path(symbol, field):
+    return os.path.join(_folder(), f"{symbol.upper()}_{field}.pkl")
+
+
+def _read_index(symbol):
+    path = _index_path(symbol)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+
+def _write_field(symbol, field, value, fetched_at):
+    with _lock:
+        os.makedirs(_folder(), exist_ok=True)
+        index = _read_index(symbol)
+        if isinstance(value, pd.DataFrame):
+            value.to_pickle(_frame_path(symbol, field))
+            index[field] = {"fetched_at": fetched_at, "frame": True, "empty": value.empty}
+        else:
+            index[field] = {"fetched_at": fetched_at, "value": value}
+        with open(_index_path(symbol), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+
+
+def _is_fresh(entry, field, now):
+    if not entry:
+        return False
+    missing = entry.get("empty") if entry.get("frame") else entry.get("value") is None
+    max_age = MISSING_MAX_AGE if missing else MAX_AGE.get(field, DAY)
+    return now - entry["fetched_at"] < max_age
+
+
+def _cached(symbol, field, now=None):
+    # คืน (hit, value)
+    entry = _read_index(symbol).get(field)
+    if not _is_fresh(entry, field, now or time.time()):
+        return False, None
+    if entry.get("frame"):
+        path = _frame_path(symbol, field)
+        if not os.path.exists(path):
+            return False, None
+        return True, pd.read_pickle(path)
+    return True, entry.get("value")
+
+
+# ==================== PEG Ratio ====================
+def get_peg_ratio(symbol, refresh=False):
+    symbol = symbol.upper()
+    if not refresh:
+        hit, value = _cached(symbol, "peg_ratio")
+        if hit:
+            return value
+    value = get_scheduler().call(("peg_ratio", symbol), get_provider().peg_ratio, symbol)
+    _write_field(symbol, "peg_ratio", value, time.time())
+    return value
+
+
+def get_peg_ratios(symbols, refresh=False):
+    """resolve PEG ทั้ง watchlist: ตัวที่ cache ยังสดอ่านจากดิสก์ ที่เหลือยิงพร้อมกันผ่าน scheduler"""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    results, pending = {}, []
+    for symbol in symbols:
+        hit, value = (False, None) if refresh else _cached(symbol, "peg_ratio")
+        if hit:
+            results[symbol] = value
+        else:
+            pending.append(symbol)
+
+    scheduler = get_scheduler()
+    provider = get_provider()
+    futures = {s: scheduler.submit(("peg_ratio", s), provider.peg_ratio, s) for s in pending}
+    for symbol, future in futures.items():
+        try:
+            value = future.result()
+        except Exception as e:
+            print(f"Error fetching PEG ratio for {symbol}: {e}")
+            results[symbol] = None
+            continue
+        _write_field(symbol, "peg_ratio", value, time.time())
+        results[symbol] = value
+    return {s: results.get(s) for s in symbols}
+
+
+# ==================== Statements ====================
+def get_statements(symbol, refresh=False):
+    symbol = symbol.upper()
+    now = time.time()
+    cached = {}
+    for field in STATEMENTS:
+        hit, value = (False, None) if refresh else _cached(symbol, field, now)
+        if not hit:
+            break
+        cached[field] = value
+    else:
+        return cached
+
+    data = get_scheduler().call(("financials", symbol), get_provider().financials, symbol)
+    for field in STATEMENTS:
+        frame = data.get(field)
+        if frame is None:
+            frame = pd.DataFrame()
+        _write_field(symbol, field, frame, now)
+        data[field] = frame
+    return {field: data[field] for field in STATEMENTS}
@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy ไม่มีก็ยังใช้ loop ตามเวลาได้
+    lfilter = None
+
+# ==================== Indicator Engine ====================
+# คำนวณหลาย indicator ในรอบเดียวบน matrix (symbols x bars) โดยเวกเตอร์ตามแกน symbol
+# ค่าที่ได้ตรงกับ TA-Lib (seed ด้วย SMA, Wilder smoothing สำหรับ RSI, MACD เริ่มที่ slow lookback)
+# array 1 มิติก็ใช้ได้ จะถูกมองเป็น 1 symbol
+DEFAULT_PARAMS = {
+    "rsi": 14,
+    "ema": (12, 26),
+    "macd": (12, 26, 9),
+    "aroon": 14,
+    "mom": 10,
+    "roc": 10,
+    "willr": 14,
+    "ma": (5, 20, 50, 200),
+}
+INDICATORS = tuple(DEFAULT_PARAMS)
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x[np.newaxis, :] if x.ndim == 1 else x
+
+
+def first_valid(x):
+    # index แรกที่ไม่ใช่ NaN ของแต่ละแถว (ถ้าไม่มีเลยคืนความยาวแถว)
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _window_sum(x, start, n):
+    # ผลรวม x[r, start[r]:start[r]+n] ของแต่ละแถวจาก prefix sum เดียว
+    rows = np.arange(x.shape[0])
+    csum = np.concatenate([np.zeros((x.shape[0], 1)), np.cumsum(np.nan_to_num(x), axis=1)], axis=1)
+    stop = np.minimum(start + n, x.shape[1])
+    start = np.minimum(start, x.shape[1])
+    return csum[rows, stop] - csum[rows, start]
+
+
+def smooth(x, alpha, seed_idx, seed):
+    """y[seed_idx] = seed, y[t] = y[t-1] + alpha * (x[t] - y[t-1]) หลังจากนั้น, NaN ก่อนหน้า"""
+    S, T = x.shape
+    out = np.full((S, T), np.nan)
+    live = seed_idx < T
+    if not live.any():
+        return out
+    if lfilter is not None:
+        # แถวที่เริ่มพร้อมกันกรองด้วย lfilter ทีเดียว (ปกติ panel ที่ align แล้วจะมีไม่กี่กลุ่ม)
+        for t0 in np.unique(seed_idx[live]):
+            rows = np.flatnonzero(seed_idx == t0)
+            out[rows, t0] = seed[rows]
+            if t0 + 1 < T:
+                zi = ((1.0 - alpha) * seed[rows])[:, np.newaxis]
+                out[rows, t0 + 1:], _ = lfilter([alpha], [1.0, alpha - 1.0], x[rows, t0 + 1:], axis=1, zi=zi)
+        return out
+    prev = np.full(S, np.nan)
+    for t in range(int(seed_idx[live].min()), T):
+        cur = np.where(t == seed_idx, seed, prev + alpha * (x[:, t] - prev))
+        cur = np.where(t < seed_idx, np.nan, cur)
+        out[:, t] = cur
+        prev = cur
+    return out
+
+
+def ema(x, n, skip=0):
+    # seed ด้วย SMA ของ n ค่าแรก (เลื่อนออกไป skip แท่งได้ ใช้ใน MACD แบบ TA-Lib)
+    x = _as_2d(x)
+    start = first_valid(x) + skip
+    seed = _window_sum(x, start, n) / n
+    return smooth(x, 2.0 / (n + 1), start + n - 1, seed)
+
+
+def sma(x, n):
+    return sma_bank(x, (n,))[n]
+
+
+def sma_bank(x, windows):
+    """หลาย window จาก prefix sum เดียว คืน dict window -> array"""
+    x = _as_2d(x)
+    zeros = np.zeros((x.shape[0], 1))
+    missing = np.isnan(x)
+    csum = np.concatenate([zeros, np.cumsum(np.where(missing, 0.0, x), axis=1)], axis=1)
+    ccount = np.concatenate([zeros, np.cumsum(missing, axis=1)], axis=1) if missing.any() else None
+    bank = {}
+    for n in windows:
+        out = np.full(x.shape, np.nan)
+        if x.shape[1] >= n:
+            out[:, n - 1:] = (csum[:, n:] - csum[:, :-n]) / n
+            if ccount is not None:
+                out[:, n - 1:][(ccount[:, n:] - ccount[:, :-n]) > 0] = np.nan
+        bank[n] = out
+    return bank
+
+
+def rsi(x, n=14):
+    x = _as_2d(x)
+    delta = np.diff(x, axis=1, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[np.isnan(delta)] = np.nan
+    loss[np.isnan(delta)] = np.nan
+    start = first_valid(delta)
+    alpha = 1.0 / n
+    avg_gain = smooth(gain, alpha, start + n - 1, _window_sum(gain, start, n) / n)
+    avg_loss = smooth(loss, alpha, start + n - 1, _window_sum(loss, start, n) / n)
+    total = avg_gain + avg_loss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(total != 0, 100.0 * avg_gain / total, 0.0)
+    out[np.isnan(total)] = np.nan
+    return out
+
+
+def macd(x, fast=12, slow=26, signal=9, slow_ema=None):
+    x = _as_2d(x)
+    slow_line = ema(x, slow) if slow_ema is None else slow_ema
+    fast_line = ema(x, fast, skip=slow - fast)
+    line = fast_line - slow_line
+    signal_line = ema(line, signal)
+    line = np.where(np.isnan(signal_line), np.nan, line)
+    return line, signal_line, line - signal_line
+
+
+def rolling_max(x, n):
+    return _rolling_extreme(x, n, np.greater_equal)[0]
+
+
+def rolling_min(x, n):
+    return _rolling_extreme(x, n, np.less_equal)[0]
+
+
+def _rolling_extreme(x, n, better):
+    # doubling: window 1 -> 2 -> 4 ... แล้วรวมสอง window ที่ซ้อนกันให้ได้ความยาว n (log2(n) รอบแทน n รอบ)
+    # คืนค่าสุดขั้ว และจำนวนแท่งนับจากตำแหน่งล่าสุดที่ทำค่านั้น
+    x = _as_2d(x)
+    S, T = x.shape
+    best = np.full((S, T), np.nan)
+    since = np.full((S, T), np.nan)
+    if T < n:
+        return best, since
+    missing = np.isnan(x)
+    fill = -np.inf if better is np.greater_equal else np.inf
+    val = np.where(missing, fill, x)
+    pos = np.broadcast_to(np.arange(T, dtype=np.float64), (S, T)).copy()
+
+    def combine(older_v, older_p, newer_v, newer_p):
+        take = better(newer_v, older_v)
+        return np.where(take, newer_v, older_v), np.where(take, newer_p, older_p)
+
+    span = 1
+    while span * 2 <= n:
+        v, p = val.copy(), pos.copy()
+        v[:, span:], p[:, span:] = combine(val[:, :-span], pos[:, :-span], val[:, span:], pos[:, span:])
+        val, pos, span = v, p, span * 2
+    if span < n:
+        shift = n - span
+        v, p = combine(val[:, :-shift], pos[:, :-shift], val[:, shift:], pos[:, shift:])
+        val, pos = val.copy(), pos.copy()
+        val[:, shift:], pos[:, shift:] = v, p
+
+    count = np.concatenate([np.zeros((S, 1)), np.cumsum(missing, axis=1)], axis=1)
+    invalid = (count[:, n:] - count[:, :-n]) > 0
+    best[:, n - 1:] = np.where(invalid, np.nan, val[:, n - 1:])
+    since[:, n - 1:] = np.where(invalid, np.nan, np.arange(n - 1, T) - pos[:, n - 1:])
+    return best, since
+
+
+def aroon(high, low, n=14):
+    # window n+1 แท่ง ถ้าค่าเท่ากันนับตัวล่าสุดแบบ TA-Lib
+    _, since_high = _rolling_extreme(high, n + 1, np.greater_equal)
+    _, since_low = _rolling_extreme(low, n + 1, np.less_equal)
+    return 100.0 * (n - since_low) / n, 100.0 * (n - since_high) / n
+
+
+def mom(x, n=10):
+    x = _as_2d(x)
+    out = np.full(x.shape, np.nan)
+    out[:, n:] = x[:, n:] - x[:, :-n]
+    return out
+
+
+def roc(x, n=10):
+    x = _as_2d(x)
+    out = np.full(x.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, n:] = np.where(x[:, :-n] != 0, (x[:, n:] / x[:, :-n] - 1.0) * 100.0, 0.0)
+    out[:, n:][np.isnan(x[:, n:] + x[:, :-n])] = np.nan
+    return out
+
+
+def willr(high, low, close, n=14, highest=None, lowest=None):
+    highest = rolling_max(high, n) if highest is None else highest
+    lowest = rolling_min(low, n) if lowest is None else lowest
+    spread = highest - lowest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(spread != 0, -100.0 * (highest - _as_2d(close)) / spread, 0.0)
+    out[np.isnan(spread)] = np.nan
+    return out
+
+
+# ==================== Single-pass compute ====================
+def compute(close, high=None, low=None, volume=None, indicators=INDICATORS, params=None):
+    """คำนวณ indicator ที่ขอทั้งหมดบน matrix (symbols x bars) คืน dict ชื่อ -> array"""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    close = _as_2d(close)
+    high = close if high is None else _as_2d(high)
+    low = close if low is None else _as_2d(low)
+    out = {}
+
+    # intermediates ที่ใช้ร่วมกันระหว่าง indicator
+    emas = {}
+    def ema_of(n):
+        if n not in emas:
+            emas[n] = ema(close, n)
+        return emas[n]
+
+    if "rsi" in indicators:
+        out["rsi"] = rsi(close, params["rsi"])
+    if "ema" in indicators:
+        for n in params["ema"]:
+            out[f"ema_{n}"] = ema_of(n)
+    if "macd" in indicators:
+        fast, slow, signal = params["macd"]
+        line, signal_line, hist = macd(close, fast, slow, signal, slow_ema=ema_of(slow))
+        out["macd"], out["macd_signal"], out["macd_hist"] = line, signal_line, hist
+    if "aroon" in indicators:
+        out["aroon_down"], out["aroon_up"] = aroon(high, low, params["aroon"])
+    if "mom" in indicators:
+        out["mom"] = mom(close, params["mom"])
+    if "roc" in indicators:
+        out["roc"] = roc(close, params["roc"])
+    if "willr" in indicators:
+        out["willr"] = willr(high, low, close, params["willr"])
+    if "ma" in indicators:
+        for n, values in sma_bank(close, params["ma"]).items():
+            out[f"ma_{n}"] = values
+    return out
+
+
+def panel_arrays(panel, fill=True):
+    """แยก panel จาก BarStore.load_panel เป็น (symbols, dates, dict field -> array symbols x bars)"""
+    symbols = list(panel["Close"].columns)
+    prices = panel[["Open", "High", "Low", "Close"]]
+    if fill:
+        prices = prices.ffill()  # เติมวันหยุดที่ไม่ตรงกันระหว่างตลาด
+    arrays = {f: prices[f][symbols].to_numpy(dtype=np.float64).T for f in ("Open", "High", "Low", "Close")}
+    if "Volume" in panel:
+        arrays["Volume"] = panel["Volume"][symbols].fillna(0).to_numpy(dtype=np.float64).T
+    return symbols, panel.index, arrays
+
+
+def compute_panel(panel, indicators=INDICATORS, params=None):
+    """เหมือน compute แต่รับ panel และคืน dict ชื่อ -> DataFrame (dates x symbols)"""
+    symbols, dates, arrays = panel_arrays(panel)
+    results = compute(arrays["Close"], arrays["High"], arrays["Low"], arrays.get("Volume"),
+                      indicators=indicators, params=params)
+    return {name: pd.DataFrame(values.T, index=dates, columns=symbols) for name, values in results.items()}
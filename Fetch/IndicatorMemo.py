@@ -0,0 +1,120 @@
+import os
+import time
+import pickle
+import hashlib
+import functools
+import threading
+import numpy as np
+from Fetch.BarCache import BarCache
+from Fetch.Provider import get_provider
+
+# ==================== Indicator Memoization ====================
+# ผลลัพธ์ indicator ขึ้นกับ (provider, symbol, interval, ช่วงแท่ง, OHLCV แท่งล่าสุด, ชื่อ, parameter) เท่านั้น
+# แท่งล่าสุดอยู่ใน key เพราะ delta refresh แก้แท่งที่ยังไม่ปิดได้โดย ts/จำนวนแท่งไม่เปลี่ยน
+# ถ้ายังไม่มีแท่งใหม่ การกดซ้ำหรือ export ซ้ำจะได้ค่าเดิมทันที ตัวที่ถูก evict สามารถ spill ลงดิสก์ได้
+# ไฟล์ spill ที่เก่าเกิน max_spill_age หรือทำให้โฟลเดอร์เกิน max_spill_bytes จะถูกลบ (เก่าสุดก่อน) ทุกครั้งที่เขียน
+SPILL_BYTES = 512 * 1024 * 1024
+SPILL_AGE = 7 * 24 * 60 * 60
+
+
+class IndicatorMemo(BarCache):
+    def __init__(self, max_entries=4096, max_bytes=128 * 1024 * 1024, spill_dir=None,
+                 max_spill_bytes=SPILL_BYTES, max_spill_age=SPILL_AGE):
+        super().__init__(ttl=float("inf"), max_entries=max_entries, max_bytes=max_bytes)
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self.max_spill_age = max_spill_age
+        self.disk_hits = 0
+        self.spill_pruned = 0
+        self._spill_lock = threading.Lock()  # แยกจาก lock ของ cache: เขียน/prune ดิสก์ไม่บล็อก get/put
+
+    def get(self, key):
+        value = super().get(key)
+        if value is not None or not self.spill_dir:
+            return value
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        with self._lock:
+            self.misses -= 1  # นับเป็น hit จากดิสก์แทน
+            self.hits += 1
+            self.disk_hits += 1
+        self.put(key, value)
+        return value
+
+    def stats(self):
+        stats = super().stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["spill_pruned"] = self.spill_pruned
+        return stats
+
+    def _on_evict(self, key, value):
+        if not self.spill_dir:
+            return
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_path(key), "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._prune_spill()
+
+    def _prune_spill(self):
+        files = []
+        with os.scandir(self.spill_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl") and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - self.max_spill_age
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.spill_pruned += 1
+
+    def _spill_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.pkl")
+
+
+memo = IndicatorMemo(spill_dir=os.environ.get("SOMESTOCK_MEMO_DIR"))
+
+
+def _freeze(value):
+    # ผลลัพธ์ถูกแชร์ระหว่างผู้เรียก จึงล็อกไม่ให้แก้ไข
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+def _last_bar(bars):
+    # bytes ของ OHLCV แท่งล่าสุด (เทียบค่าได้แม้มี NaN)
+    return b"".join(getattr(bars, f)[-1:].tobytes() for f in ("open", "high", "low", "close", "volume"))
+
+
+def memoized(name, interval="1d"):
+    """decorator สำหรับฟังก์ชัน fn(bars, **params) ที่ bars เป็น BarSeries"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(bars, **params):
+            if len(bars) == 0:
+                return fn(bars, **params)
+            key = (get_provider().name, bars.symbol, interval, int(bars.ts[0]), bars.last_ts, len(bars),
+                   _last_bar(bars), name, tuple(sorted(params.items())))
+            return memo.get_or_load(key, lambda: _freeze(fn(bars, **params)))
+        return wrapper
+    return decorator
+
+
+def memo_stats():
+    return memo.stats()
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import time
+import joblib
+import numpy as np
+import torch
+from Fetch.BarCache import BarCache
+
+# ==================== Model Registry ====================
+# เก็บโมเดลที่โหลดแล้วไว้ในหน่วยความจำ (LRU) และบันทึก artifact ลงดิสก์พร้อม fingerprint ของข้อมูลที่ใช้ train
+#   Model/{symbol}_{params}_model.pt      state_dict
+#   Model/{symbol}_{params}_scaler.joblib scaler ทั้งตัว (min/max/scale ครบ)
+#   Model/{symbol}_{params}_meta.json     fingerprint: parameter, ช่วงแท่ง, ราคาปิดแท่งสุดท้าย, เวลา train, metrics
+# {params} = hash ของ parameter (window_size, epochs, ...) ผู้เรียกที่ใช้ parameter ต่างกันจึงไม่เขียนทับกัน
+# train ใหม่เฉพาะเมื่อ fingerprint ต่างเกิน threshold; artifact รุ่นเก่า (_scaler.npy ไม่มี meta) ถือว่า stale
+# ถ้าต่างกันแค่มีแท่งใหม่ต่อท้าย และมี updater -> fine-tune ต่อจากโมเดลเดิม (ดู Prediction.update_model)
+MODEL_DIR = "Model"
+MAX_NEW_BARS = 0              # มีแท่งใหม่เกินนี้นับจาก fingerprint ล่าสุด -> update (หรือ train ใหม่ถ้าไม่มี updater)
+MAX_AGE = 30 * 24 * 60 * 60   # อายุโมเดลสูงสุด (วินาที)
+PRICE_TOLERANCE = 0.01        # ราคาปิดแท่งเดิมเปลี่ยนเกิน 1% (เช่น split/ปรับราคาย้อนหลัง) -> scaler ใช้ไม่ได้แล้ว
+DRIFT_HISTORY = 60            # จำนวน drift record ล่าสุดที่เก็บใน meta
+NEW_BARS = "new bars"
+
+
+class ModelRegistry(BarCache):
+    def __init__(self, folder=MODEL_DIR, max_models=32, max_new_bars=MAX_NEW_BARS, max_age=MAX_AGE):
+        super().__init__(ttl=float("inf"), max_entries=max_models, max_bytes=float("inf"))
+        self.folder = folder
+        self.max_new_bars = max_new_bars
+        self.max_age = max_age
+        self.trains = 0
+        self.updates = 0
+        self.disk_loads = 0
+
+    # ---------- Paths ----------
+    def artifact_path(self, symbol, params, suffix):
+        return os.path.join(self.folder, f"{symbol.upper()}_{params_hash(params)}_{suffix}")
+
+    # ---------- Fingerprint ----------
+    @staticmethod
+    def fingerprint(bars, **params):
+        return {
+            "symbol": bars.symbol,
+            "params": params,
+            "first_ts": int(bars.ts[0]),
+            "last_ts": int(bars.ts[-1]),
+            "n_bars": len(bars),
+            "last_close": float(bars.close[-1]),
+        }
+
+    def stale_reason(self, meta, bars, params):
+        """คืนเหตุผลที่โมเดลใช้ไม่ได้แล้ว หรือ None ถ้ายังใช้ได้ (NEW_BARS = ต่อยอดด้วย fine-tune ได้)"""
+        if meta is None:
+            return "no metadata"
+        if meta.get("params") != params:
+            return "parameters changed"
+        if time.time() - meta.get("trained_at", 0) > self.max_age:
+            return "too old"
+        i = int(np.searchsorted(bars.ts, meta["last_ts"]))
+        if i < len(bars) and bars.ts[i] == meta["last_ts"]:
+            if abs(bars.close[i] / meta["last_close"] - 1.0) > PRICE_TOLERANCE:
+                return "history revised"
+        if self.new_bar_count(meta, bars) > self.max_new_bars:
+            return NEW_BARS
+        return None
+
+    @staticmethod
+    def new_bar_count(meta, bars):
+        return int(np.count_nonzero(bars.ts > meta["last_ts"]))
+
+    # ---------- Disk ----------
+    def read_meta(self, symbol, params):
+        path = self.artifact_path(symbol, params, "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return None
+
+    def load(self, symbol, params, factory):
+        """โหลด (model, scaler, meta) ของ parameter ชุดนี้จากดิสก์ ถ้า artifact ครบ"""
+        meta = self.read_meta(symbol, params)
+        model_path = self.artifact_path(symbol, params, "model.pt")
+        scaler_path = self.artifact_path(symbol, params, "scaler.joblib")
+        if meta is None or not os.path.exists(model_path) or not os.path.exists(scaler_path):
+            return None
+        model = factory()
+        model.load_state_dict(torch.load(model_path))
+        model.eval()
+        self.disk_loads += 1
+        print(f"📂 Loaded model from {model_path}")
+        return model, joblib.load(scaler_path), meta
+
+    def save(self, symbol, model, scaler, fingerprint, metrics=None):
+        os.makedirs(self.folder, exist_ok=True)
+        params = fingerprint["params"]
+        meta = {**fingerprint, "trained_at": time.time(), "metrics": metrics or {}}
+        torch.save(model.state_dict(), self.artifact_path(symbol, params, "model.pt"))
+        joblib.dump(scaler, self.artifact_path(symbol, params, "scaler.joblib"))
+        tmp_path = self.artifact_path(symbol, params, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.artifact_path(symbol, params, "meta.json"))
+        self.put(self._key(symbol, params), (model, scaler, meta))
+        return meta
+
+    def update(self, symbol, model, scaler, fingerprint, drift):
+        """บันทึก weight หลัง fine-tune: เลื่อน fingerprint ไปแท่งล่าสุด เก็บ trained_at/metrics ของการ train เต็มไว้"""
+        params = fingerprint["params"]
+        meta = self.read_meta(symbol, params) or {}
+        meta.update(fingerprint)
+        meta["updated_at"] = time.time()
+        meta["drift"] = (meta.get("drift", []) + [{"at": meta["updated_at"], **drift}])[-DRIFT_HISTORY:]
+        torch.save(model.state_dict(), self.artifact_path(symbol, params, "model.pt"))
+        tmp_path = self.artifact_path(symbol, params, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.artifact_path(symbol, params, "meta.json"))
+        self.put(self._key(symbol, params), (model, scaler, meta))
+        self.updates += 1
+        return meta
+
+    # ---------- Lookup ----------
+    @staticmethod
+    def _key(symbol, params):
+        return (symbol.upper(), tuple(sorted(params.items())))
+
+    def get_model(self, bars, params, factory, trainer, updater=None):
+        """คืน (model, scaler): หน่วยความจำ -> ดิสก์ -> fine-tune -> train ใหม่
+        trainer() / updater(model, scaler, meta) ต้องเรียก save / update เอง; updater คืน None = ให้ train ใหม่"""
+        symbol = bars.symbol
+        key = self._key(symbol, params)
+        entry = self.get(key)
+        if entry is None:
+            entry = self.load(symbol, params, factory)
+        reason = self.stale_reason(entry[2] if entry else None, bars, params)
+        if reason is None:
+            self.put(key, entry)
+            return entry[0], entry[1]
+
+        if reason == NEW_BARS and updater is not None:
+            result = updater(*entry)
+            if result is not None:
+                return result
+            reason = "update rejected"
+        print(f"🔁 Training {symbol}: {reason}")
+        self.trains += 1
+        return trainer()
+
+    def stats(self):
+        stats = super().stats()
+        stats["trains"] = self.trains
+        stats["updates"] = self.updates
+        stats["disk_loads"] = self.disk_loads
+        return stats
+
+
+def params_hash(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,186 @@
+import os
+import time
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from Fetch import Backtest
+from Fetch.BarCache import BarCache
+from Fetch.BarStore import load_panel
+from Fetch.IndicatorEngine import panel_arrays
+from Fetch.Manage_FAV import loadfave
+
+# ==================== Strategy Parameter Optimizer ====================
+# กระจายชุด parameter ไปยัง process pool โดยราคา (close/high/low ของทุก symbol) อยู่ใน shared memory ก้อนเดียว
+# worker แค่ attach แล้วมองเป็น numpy array (ไม่ pickle DataFrame ต่อ task)
+# แต่ละชุด parameter ประเมินแบบ walk-forward: in-sample (train) แล้วดูผลจริงใน out-of-sample (test) ถัดไป
+GRIDS = {
+    "ma_cross": {"fast": (5, 10, 15, 20, 30, 40, 50), "slow": (20, 30, 50, 75, 100, 150, 200)},
+    "ema_cross": {"fast": (5, 8, 10, 12, 15, 20), "slow": (20, 26, 30, 50, 100, 200)},
+    "rsi": {"n": (7, 14, 21), "lower": (20, 25, 30, 35), "upper": (60, 65, 70, 75, 80)},
+    "aroon": {"n": (10, 14, 20, 25, 30, 40, 50)},
+}
+WORKER_CACHE_BYTES = 256 * 1024 * 1024  # เส้น indicator ที่ใช้ซ้ำต่อ worker (เช่น SMA 50 ใช้กับ fast หลายค่า)
+
+
+def param_grid(grid):
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    # ตัดชุดที่ไม่มีความหมาย
+    combos = [c for c in combos if c.get("fast", 0) < c.get("slow", 1) and c.get("lower", 0) < c.get("upper", 1)]
+    return combos
+
+
+def walk_forward_splits(n_bars, folds=4, train_bars=None, test_bars=None):
+    """rolling-origin: คืน list ของ (train slice, test slice) ที่ test ต่อท้าย train และเลื่อนไปทีละ test_bars"""
+    test_bars = test_bars or n_bars // (folds + 3)
+    train_bars = train_bars or n_bars - folds * test_bars
+    if test_bars <= 0 or train_bars <= 0 or train_bars + folds * test_bars > n_bars:
+        raise ValueError("Not enough bars for the requested walk-forward splits")
+    start = n_bars - train_bars - folds * test_bars
+    splits = []
+    for k in range(folds):
+        a = start + k * test_bars
+        b = a + train_bars
+        splits.append((slice(a, b), slice(b, b + test_bars)))
+    return splits
+
+
+def _metrics(growth, window):
+    # พอร์ตแบ่งเงินเท่ากันทุก symbol: ผลตอบแทนต่อแท่ง = ค่าเฉลี่ยข้าม symbol
+    r = growth[:, window].mean(axis=0) - 1.0
+    std = r.std()
+    sharpe = r.mean() / std * np.sqrt(Backtest.BARS_PER_YEAR) if std > 0 else np.nan
+    return sharpe, float(np.prod(1.0 + r) - 1.0)
+
+
+def evaluate(prices, strategy, params_list, splits, commission=Backtest.COMMISSION,
+             slippage=Backtest.SLIPPAGE, cache=None):
+    """prices: array (3 x symbols x bars) = close, high, low -> list ของแถวผลลัพธ์"""
+    close, high, low = prices
+    signal_fn = Backtest.SIGNALS[strategy]
+    rows = []
+    for params in params_list:
+        # สัญญาณคำนวณบนทั้งช่วงครั้งเดียว (causal) แล้วตัดตาม fold เพื่อให้มี warm-up ก่อน test
+        signal = signal_fn(close, high=high, low=low, cache=cache, **params)
+        _, _, growth = Backtest.simulate(close, signal, commission, slippage)
+        for fold, (train, test) in enumerate(splits):
+            is_sharpe, is_return = _metrics(growth, train)
+            oos_sharpe, oos_return = _metrics(growth, test)
+            rows.append({"strategy": strategy, **params, "fold": fold,
+                         "is_sharpe": is_sharpe, "is_return": is_return,
+                         "oos_sharpe": oos_sharpe, "oos_return": oos_return})
+    return rows
+
+
+# ==================== Worker side ====================
+_shared = {}
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm  # เก็บ reference ไว้ ไม่งั้น buffer จะถูกปิด
+    _shared["prices"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _shared["cache"] = BarCache(ttl=24 * 60 * 60, max_entries=1024, max_bytes=WORKER_CACHE_BYTES)
+
+
+def _evaluate_chunk(strategy, params_list, splits, commission, slippage):
+    return evaluate(_shared["prices"], strategy, params_list, splits, commission, slippage, cache=_shared["cache"])
+
+
+# ==================== Driver ====================
+def _report(done, total, started):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else float("nan")
+    print(f"⏳ {done}/{total} combos ({done / total:.0%}) {rate:.1f} combos/s, ETA {eta:.0f}s")
+
+
+def optimize_arrays(close, high=None, low=None, strategy="ma_cross", grid=None, folds=4, train_bars=None,
+                    test_bars=None, workers=None, chunks_per_worker=4, commission=Backtest.COMMISSION,
+                    slippage=Backtest.SLIPPAGE, progress=_report):
+    """close/high/low: array (symbols x bars) คืน (results, report)"""
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    high = close if high is None else np.atleast_2d(np.asarray(high, dtype=np.float64))
+    low = close if low is None else np.atleast_2d(np.asarray(low, dtype=np.float64))
+    combos = param_grid(grid or GRIDS[strategy])
+    splits = walk_forward_splits(close.shape[1], folds, train_bars, test_bars)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows = []
+
+    if workers == 1:
+        cache = BarCache(ttl=24 * 60 * 60, max_entries=1024, max_bytes=WORKER_CACHE_BYTES)
+        rows = evaluate(np.stack([close, high, low]), strategy, combos, splits, commission, slippage, cache=cache)
+        if progress:
+            progress(len(combos), len(combos), started)
+    else:
+        # เรียง combo ไว้แล้ว chunk ติดกันจึงใช้เส้น indicator ซ้ำใน cache ของ worker ได้มาก
+        size = max(1, -(-len(combos) // (workers * chunks_per_worker)))
+        chunks = [combos[i:i + size] for i in range(0, len(combos), size)]
+        workers = min(workers, len(chunks))  # ขนาด pool ที่สร้างจริง
+        shape = (3,) + close.shape
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        try:
+            prices = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            prices[0], prices[1], prices[2] = close, high, low
+            done = 0
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                     initargs=(shm.name, shape, np.float64)) as pool:
+                futures = {pool.submit(_evaluate_chunk, strategy, chunk, splits, commission, slippage): len(chunk)
+                           for chunk in chunks}
+                for future in as_completed(futures):
+                    rows.extend(future.result())
+                    done += futures[future]
+                    if progress:
+                        progress(done, len(combos), started)
+            del prices
+        finally:
+            shm.close()
+            shm.unlink()
+
+    elapsed = time.perf_counter() - started
+    results = pd.DataFrame(rows)
+    report = {
+        "strategy": strategy,
+        "combos": len(combos),
+        "folds": len(splits),
+        "symbols": close.shape[0],
+        "bars": close.shape[1],
+        "workers": workers,
+        "seconds": elapsed,
+        "combos_per_sec": len(combos) / elapsed if elapsed > 0 else float("nan"),
+        "symbol_bars_per_sec": len(combos) * close.size / elapsed if elapsed > 0 else float("nan"),
+    }
+    return results, report
+
+
+def walk_forward_summary(results):
+    """ต่อ fold เลือก parameter ที่ in-sample sharpe ดีที่สุด แล้วดูผลของมันใน out-of-sample"""
+    param_cols = [c for c in results.columns
+                  if c not in ("strategy", "fold", "is_sharpe", "is_return", "oos_sharpe", "oos_return")]
+    best = results.loc[results.groupby("fold")["is_sharpe"].idxmax().dropna()]
+    return best[["fold", *param_cols, "is_sharpe", "oos_sharpe", "is_return", "oos_return"]].reset_index(drop=True)
+
+
+def robust_params(results):
+    """parameter ที่ค่าเฉลี่ย out-of-sample sharpe ข้ามทุก fold ดีที่สุด"""
+    param_cols = [c for c in results.columns
+                  if c not in ("strategy", "fold", "is_sharpe", "is_return", "oos_sharpe", "oos_return")]
+    table = results.groupby(param_cols)[["is_sharpe", "oos_sharpe", "oos_return"]].mean()
+    return table.sort_values("oos_sharpe", ascending=False)
+
+
+def optimize(symbols, strategy="ma_cross", grid=None, period="10y", folds=4, workers=None, progress=_report):
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    panel = load_panel(symbols, period=period)
+    if panel.empty:
+        return None, None
+    _, _, arrays = panel_arrays(panel)
+    return optimize_arrays(arrays["Close"], arrays["High"], arrays["Low"], strategy=strategy, grid=grid,
+                           folds=folds, workers=workers, progress=progress)
+
+
+def optimize_watchlist(filepath, strategy="ma_cross", grid=None, period="10y", folds=4, workers=None):
+    return optimize(loadfave(filepath), strategy=strategy, grid=grid, period=period, folds=folds, workers=workers)
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from Fetch.BarStore import load_panel
+from Fetch.IndicatorEngine import panel_arrays
+from Fetch.Manage_FAV import loadfave
+from Fetch.TA import backend_name, ta
+
+# ==================== Candlestick Pattern Scanner ====================
+# สแกนทุก symbol พร้อมกันบน array (symbols x bars) แล้วคืนตาราง hit แบบ sparse (symbol, date, pattern)
+# นิยาม doji/hammer ตรงกับ detect_doji/detect_hammer ใน Prediction
+def _parts(o, h, l, c):
+    body = np.abs(c - o)
+    range_ = h - l
+    lower = np.minimum(o, c) - l
+    upper = h - np.maximum(o, c)
+    return body, range_, lower, upper
+
+
+def _prev(x):
+    out = np.full(x.shape, np.nan)
+    out[:, 1:] = x[:, :-1]
+    return out
+
+
+def doji(o, h, l, c):
+    body, range_, _, _ = _parts(o, h, l, c)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (body / range_) < 0.1
+
+
+def hammer(o, h, l, c):
+    body, _, lower, upper = _parts(o, h, l, c)
+    return (lower >= 2 * body) & (upper <= 0.1 * body)
+
+
+def shooting_star(o, h, l, c):
+    body, _, lower, upper = _parts(o, h, l, c)
+    return (upper >= 2 * body) & (lower <= 0.1 * body)
+
+
+def bullish_engulfing(o, h, l, c):
+    o1, c1 = _prev(o), _prev(c)
+    return (c1 < o1) & (c > o) & (o <= c1) & (c >= o1)
+
+
+def bearish_engulfing(o, h, l, c):
+    o1, c1 = _prev(o), _prev(c)
+    return (c1 > o1) & (c < o) & (o >= c1) & (c <= o1)
+
+
+def marubozu(o, h, l, c):
+    body, range_, _, _ = _parts(o, h, l, c)
+    return (range_ > 0) & (body >= 0.95 * range_)
+
+
+PATTERNS = {
+    "doji": doji,
+    "hammer": hammer,
+    "shooting_star": shooting_star,
+    "bullish_engulfing": bullish_engulfing,
+    "bearish_engulfing": bearish_engulfing,
+    "marubozu": marubozu,
+}
+BEARISH = {"shooting_star", "bearish_engulfing"}  # signal = -1
+
+# pattern แบบ TA-Lib ที่เรียกเพิ่มได้ผ่าน backend ใน Fetch.TA (รันทีละแถว)
+# backend NumPy มีเฉพาะ CDLDOJI, CDLHAMMER, CDLSHOOTINGSTAR, CDLENGULFING
+TALIB_PATTERNS = ("CDLMORNINGSTAR", "CDLEVENINGSTAR", "CDLHARAMI", "CDLPIERCING", "CDLDARKCLOUDCOVER", "CDL3WHITESOLDIERS")
+
+
+def scan_arrays(symbols, dates, o, h, l, c, patterns=tuple(PATTERNS), talib_patterns=()):
+    """o/h/l/c: array (symbols x bars) คืน DataFrame [symbol, date, pattern, signal] เฉพาะจุดที่เจอ"""
+    o, h, l, c = (np.atleast_2d(np.asarray(x, dtype=np.float64)) for x in (o, h, l, c))
+    symbols = np.asarray(symbols, dtype=object)
+    if not (isinstance(dates, pd.DatetimeIndex) or pd.api.types.is_datetime64_any_dtype(np.asarray(dates))):
+        # index ตัวเลข (เช่น JSON ที่ไม่มีคอลัมน์ Date) จะกลายเป็นวันที่ปี 1970
+        raise ValueError("dates must be datetime values, not a positional index")
+    dates = pd.DatetimeIndex(dates)
+    frames = []
+
+    def collect(name, signal):
+        rows, cols = np.nonzero(signal)
+        if len(rows):
+            frames.append(pd.DataFrame({
+                "symbol": symbols[rows],
+                "date": dates[cols],
+                "pattern": name,
+                "signal": signal[rows, cols].astype(np.int16),
+            }))
+
+    with np.errstate(invalid="ignore"):
+        for name in patterns:
+            sign = -1 if name in BEARISH else 1
+            collect(name, PATTERNS[name](o, h, l, c).astype(np.int16) * sign)
+
+    if talib_patterns:
+        for name in talib_patterns:
+            fn = getattr(ta, name, None)
+            if fn is None:
+                raise ValueError(f"{name} requires TA-Lib (current TA backend: {backend_name()})")
+            signal = np.zeros(o.shape, dtype=np.int16)
+            for row in range(o.shape[0]):
+                valid = ~np.isnan(c[row])
+                if valid.sum() > 0:
+                    signal[row, valid] = np.sign(fn(o[row, valid], h[row, valid], l[row, valid], c[row, valid])).astype(np.int16)
+            collect(name, signal)
+
+    if not frames:
+        return pd.DataFrame(columns=["symbol", "date", "pattern", "signal"])
+    hits = pd.concat(frames, ignore_index=True)
+    return hits.sort_values(["date", "symbol", "pattern"], ignore_index=True)
+
+
+def scan_panel(panel, patterns=tuple(PATTERNS), talib_patterns=()):
+    # ไม่ ffill เพราะแท่งที่ถูกเติมจะกลายเป็น pattern ปลอม
+    symbols, dates, arrays = panel_arrays(panel, fill=False)
+    return scan_arrays(symbols, dates, arrays["Open"], arrays["High"], arrays["Low"], arrays["Close"],
+                       patterns=patterns, talib_patterns=talib_patterns)
+
+
+def scan_watchlist(symbols_or_file, patterns=tuple(PATTERNS), talib_patterns=(), period="1y"):
+    symbols = loadfave(symbols_or_file) if isinstance(symbols_or_file, str) else list(symbols_or_file)
+    if not symbols:
+        return pd.DataFrame(columns=["symbol", "date", "pattern", "signal"])
+    panel = load_panel(symbols, period=period)
+    if panel.empty:
+        return pd.DataFrame(columns=["symbol", "date", "pattern", "signal"])
+    return scan_panel(panel, patterns=patterns, talib_patterns=talib_patterns)
@@ -1,29 +1,41 @@
 import os
 import joblib
 import math
+import time
 import numpy as np
-import yfinance as yf
-import talib
+import pandas as pd
 import matplotlib.pyplot as plt
 import mplfinance as mpf
-import requests
 import torch
 import torch.nn as nn
-from torch.utils.data import Dataset, DataLoader
-from bs4 import BeautifulSoup
+from torch.utils.data import Dataset, DataLoader, BatchSampler, RandomSampler, SequentialSampler
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error
 from sklearn.linear_model import LinearRegression
+from Fetch.BarStore import frames_to_panel, load_history, load_many
+from Fetch.BarCache import bar_cache
+from Fetch.BarSeries import BarSeries
+from Fetch import IndicatorEngine, Binomial
+from Fetch.TA import ta
+from Fetch.IndicatorMemo import memoized
+from Fetch.ModelRegistry import MAX_AGE, ModelRegistry, model_registry
+from Fetch.Fundamentals import get_peg_ratio, get_peg_ratios
 
 # ==================== Dataset ====================
+# window เป็น strided view ของ array ราคาเดิม (sliding_window_view) ไม่ copy ซ้ำ window_size เท่า
+# index รับได้ทั้งตัวเลขเดียวและ array ของ index จึงดึงทั้ง batch ด้วย fancy indexing ครั้งเดียว (ดู batch_loader)
 class StockDataset(Dataset):
     def __init__(self, prices, window_size=10):
-        self.X, self.y = [], []
-        for i in range(len(prices) - window_size):
-            self.X.append(prices[i:i + window_size])
-            self.y.append(prices[i + window_size])
-        self.X = np.array(self.X, dtype=np.float32)
-        self.y = np.array(self.y, dtype=np.float32).reshape(-1, 1)
+        prices = np.ascontiguousarray(prices, dtype=np.float32).ravel()
+        n = max(len(prices) - window_size, 0)
+        self.prices = prices
+        if n == 0:
+            # ราคาสั้นกว่า window (sliding_window_view จะ error) -> dataset ว่างแบบเดิม
+            self.X = np.zeros((0, window_size), dtype=np.float32)
+        else:
+            self.X = sliding_window_view(prices, window_size)[:n]
+        self.y = prices[window_size:window_size + n].reshape(-1, 1)
 
     def __len__(self):
         return len(self.X)
@@ -31,6 +43,57 @@ class StockDataset(Dataset):
     def __getitem__(self, idx):
         return self.X[idx], self.y[idx]
 
+class MultiSymbolDataset(Dataset):
+    """ต่อราคาหลาย symbol เป็น array เดียว แล้วตัด window ที่คร่อมรอยต่อระหว่าง symbol ทิ้ง
+    horizon > 1: y คือราคา horizon แท่งถัดไป (ใช้กับหัวพยากรณ์หลายวันพร้อมกัน)"""
+    def __init__(self, series, window_size=10, horizon=1):
+        series = [np.asarray(s, dtype=np.float32).ravel() for s in series]
+        lengths = np.array([len(s) for s in series], dtype=np.int64)
+        self.prices = np.concatenate(series) if series else np.zeros(0, dtype=np.float32)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(series) else np.zeros(0, dtype=np.int64)
+
+        # window เริ่มที่ t ใช้ได้ถ้า t .. t+window_size+horizon-1 (รวม target) อยู่ใน symbol เดียวกัน
+        span = window_size + horizon - 1
+        valid = np.zeros(max(len(self.prices) - span, 0), dtype=bool)
+        symbol_of = np.zeros(len(valid), dtype=np.int64)
+        for sid, (start, n) in enumerate(zip(offsets, lengths)):
+            stop = min(start + n - span, len(valid))
+            if stop > start:
+                valid[start:stop] = True
+                symbol_of[start:stop] = sid
+        self.index = np.flatnonzero(valid)
+        self.symbol_ids = symbol_of[self.index]
+        self.window_size = window_size
+        self.horizon = horizon
+        self._steps = np.arange(horizon)
+        self.return_ids = False  # True = __getitem__ คืน symbol id ด้วย (ใช้กับ embedding)
+        self._windows = sliding_window_view(self.prices, window_size)
+
+    @property
+    def X(self):
+        return self._windows[self.index]
+
+    @property
+    def y(self):
+        return self.prices[self.index[:, np.newaxis] + self.window_size + self._steps]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, idx):
+        start = self.index[idx]
+        y = self.prices[np.expand_dims(start, -1) + self.window_size + self._steps]
+        if self.return_ids:
+            return self._windows[start], y, self.symbol_ids[idx]
+        return self._windows[start], y
+
+def batch_loader(dataset, batch_size=1024, shuffle=True, seed=None):
+    # sampler ส่ง list ของ index ทั้ง batch ให้ __getitem__ ทีเดียว (batch_size=None ปิด collate ทีละแถว)
+    generator = torch.Generator().manual_seed(seed) if seed is not None else None
+    base = RandomSampler(dataset, generator=generator) if shuffle else SequentialSampler(dataset)
+    sampler = BatchSampler(base, batch_size=batch_size, drop_last=False)
+    return DataLoader(dataset, sampler=sampler, batch_size=None)
+
 # ==================== Model ====================
 class StockPriceModel(nn.Module):
     def __init__(self, input_size):
@@ -46,41 +109,144 @@ class StockPriceModel(nn.Module):
     def forward(self, x):
         return self.net(x)
 
+class GlobalPriceModel(nn.Module):
+    # โมเดลเดียวสำหรับทุก symbol: รับ window ที่ normalize ต่อ symbol แล้ว (+ embedding ของ symbol ถ้าเปิด)
+    # embedding index 0 สงวนไว้สำหรับ symbol ที่ไม่เคยเห็นตอน train
+    # horizon > 1 = หัวแบบ direct multi-output: ทาย horizon แท่งถัดไปใน forward เดียว
+    def __init__(self, input_size, n_symbols=0, embed_dim=8, horizon=1):
+        super(GlobalPriceModel, self).__init__()
+        self.embedding = nn.Embedding(n_symbols + 1, embed_dim) if n_symbols and embed_dim else None
+        extra = embed_dim if self.embedding is not None else 0
+        self.horizon = horizon
+        self.net = nn.Sequential(
+            nn.Linear(input_size + extra, 64),
+            nn.ReLU(),
+            nn.Linear(64, 32),
+            nn.ReLU(),
+            nn.Linear(32, horizon)
+        )
+
+    def forward(self, x, symbol_ids=None):
+        if self.embedding is not None:
+            if symbol_ids is None:
+                symbol_ids = torch.zeros(len(x), dtype=torch.long)
+            x = torch.cat([x, self.embedding(symbol_ids)], dim=1)
+        return self.net(x)
+
 # ==================== Fetch Data ====================
+def fetch_series(symbol, period="1y"):
+    # cache เก็บเป็น BarSeries (array ล้วน) indicator อ่านอย่างเดียวจึงใช้ร่วมกันได้โดยไม่ต้อง copy
+    symbol = symbol.upper()
+    return bar_cache.get_or_load(
+        (symbol, period, "1d"),
+        lambda: BarSeries.from_frame(symbol, load_history(symbol, period=period)),
+    )
+
 def fetch_data(symbol, period="1y"):
-    data = yf.Ticker(symbol).history(period=period)
-    data.reset_index(inplace=True)
-    return data
+    return fetch_series(symbol, period).to_frame(reset_index=True)
+
+def prefetch(symbols, period="1y", panel=False):
+    # ดึงทั้ง watchlist ใน batch เดียว แล้ววางลง cache ให้ fetch_series ของแต่ละ indicator ใช้ต่อ
+    # panel=True คืน panel ที่ align แล้ว (สร้างจาก frames ชุดเดียวกัน ไม่โหลดซ้ำ)
+    frames = load_many(symbols, period=period)
+    for symbol, df in frames.items():
+        bar_cache.put((symbol, period, "1d"), BarSeries.from_frame(symbol, df))
+    if panel:
+        return frames_to_panel(frames) if frames else None
+    return None
 
-# ==================== Train Model ====================
-def train_model(symbol, window_size=10, epochs=100):
-    df = fetch_data(symbol)
-    close_prices = df["Close"].values.reshape(-1, 1)
+def cache_stats():
+    return bar_cache.stats()
 
-    scaler = MinMaxScaler()
-    scaled_prices = scaler.fit_transform(close_prices).flatten()
+# ==================== Memoized Indicator Values ====================
+# เรียกด้วย keyword เสมอ เพราะ parameter เป็นส่วนหนึ่งของ key
+@memoized("rsi")
+def rsi_values(bars, timeperiod=14):
+    return ta.RSI(bars.close, timeperiod=timeperiod)
 
-    split = int(len(scaled_prices) * 0.8)
-    train_data = scaled_prices[:split]
-    test_data = scaled_prices[split - window_size:]
+@memoized("ema")
+def ema_values(bars, timeperiod=12):
+    return ta.EMA(bars.close, timeperiod=timeperiod)
 
-    train_dataset = StockDataset(train_data, window_size)
-    test_dataset = StockDataset(test_data, window_size)
-    train_loader = DataLoader(train_dataset, batch_size=16, shuffle=True)
+@memoized("macd")
+def macd_values(bars, fastperiod=12, slowperiod=26, signalperiod=9):
+    return ta.MACD(bars.close, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod)
 
-    model = StockPriceModel(window_size)
+@memoized("aroon")
+def aroon_values(bars, timeperiod=14):
+    return ta.AROON(bars.high, bars.low, timeperiod=timeperiod)
+
+@memoized("mom")
+def mom_values(bars, timeperiod=10):
+    return ta.MOM(bars.close, timeperiod=timeperiod)
+
+@memoized("roc")
+def roc_values(bars, timeperiod=10):
+    return ta.ROC(bars.close, timeperiod=timeperiod)
+
+@memoized("willr")
+def willr_values(bars, timeperiod=14):
+    return ta.WILLR(bars.high, bars.low, bars.close, timeperiod=timeperiod)
+
+# ==================== Train Model ====================
+def fit_model(model, dataset, epochs=100, batch_size=16, lr=0.001, seed=None):
     criterion = nn.MSELoss()
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    loader = batch_loader(dataset, batch_size=batch_size, shuffle=True, seed=seed)
 
     for epoch in range(epochs):
         model.train()
-        for x_batch, y_batch in train_loader:
+        for x_batch, y_batch in loader:
             pred = model(x_batch)
             loss = criterion(pred, y_batch)
 
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
+    return model
+
+UNSEEN_RATE = 0.1  # สัดส่วน window ที่สลับ id เป็น 0 ตอน train ให้ embedding ของ symbol ที่ไม่รู้จักได้เรียนด้วย
+
+def fit_steps(model, dataset, steps=2000, batch_size=1024, lr=0.001, seed=None, unseen_rate=UNSEEN_RATE):
+    # จำนวน step คงที่ (สุ่ม batch จากทุก window) -> เวลา train ไม่โตตามจำนวน symbol
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    rng = np.random.default_rng(seed)
+    batch_size = min(batch_size, len(dataset))
+
+    model.train()
+    for step in range(steps):
+        batch = dataset[rng.integers(0, len(dataset), size=batch_size)]
+        x_batch, y_batch = torch.from_numpy(batch[0]), torch.from_numpy(batch[1])
+        ids = None
+        if len(batch) > 2:
+            ids = batch[2] + 1
+            ids[rng.random(len(ids)) < unseen_rate] = 0
+            ids = torch.from_numpy(ids)
+        loss = criterion(model(x_batch, ids) if ids is not None else model(x_batch), y_batch)
+
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    model.eval()
+    return model
+
+def train_model(symbol, window_size=10, epochs=100, batch_size=16, period="1y"):
+    bars = fetch_series(symbol, period)
+    close_prices = bars.close.reshape(-1, 1)
+
+    scaler = MinMaxScaler()
+    scaled_prices = scaler.fit_transform(close_prices).flatten()
+
+    split = int(len(scaled_prices) * 0.8)
+    train_data = scaled_prices[:split]
+    test_data = scaled_prices[split - window_size:]
+
+    train_dataset = StockDataset(train_data, window_size)
+    test_dataset = StockDataset(test_data, window_size)
+
+    model = StockPriceModel(window_size)
+    fit_model(model, train_dataset, epochs=epochs, batch_size=batch_size)
 
     model.eval()
     test_X = torch.tensor(test_dataset.X)
@@ -89,38 +255,119 @@ def train_model(symbol, window_size=10, epochs=100):
     rmse = math.sqrt(mean_squared_error(y_true, preds))
     print(f"📉 Test RMSE: {rmse:.4f}")
 
-    os.makedirs("Model", exist_ok=True)
-    torch.save(model.state_dict(), f"Model/{symbol}_model.pt")
-    np.save(f"Model/{symbol}_scaler.npy", scaler.data_max_)
+    params = model_params(window_size, epochs, batch_size, period)
+    model_registry.save(symbol, model, scaler, ModelRegistry.fingerprint(bars, **params), {"rmse": rmse})
     print(f"✅ Model & scaler saved for {symbol}")
 
     return model, scaler
 
-# ==================== Load Model & Scaler ====================
-def load_model(symbol, window_size=10):
-    model = StockPriceModel(window_size)
-    path = f"Model/{symbol}_model.pt"
-    if os.path.exists(path):
-        model.load_state_dict(torch.load(path))
-        model.eval()
-        print(f"📂 Loaded model from {path}")
-        return model
-    return None
+def model_params(window_size=10, epochs=100, batch_size=16, period="1y"):
+    return {"window_size": window_size, "epochs": epochs, "batch_size": batch_size, "period": period}
 
-def load_scaler(symbol):
-    path = f"Model/{symbol}_scaler.npy"
-    if os.path.exists(path):
-        max_val = np.load(path)
-        scaler = MinMaxScaler()
-        scaler.fit(np.array([[0], [max_val.item()]]))
-        return scaler
-    return None
+# ==================== Incremental Update ====================
+# มีแท่งใหม่ต่อท้าย -> fine-tune โมเดลเดิมไม่กี่ step บน window ใหม่ + replay window เก่าที่สุ่มมา (กันลืมของเดิม)
+# ก่อน fine-tune วัด error บน window ล่าสุด ถ้าแย่กว่า RMSE ตอน train เต็มเกิน DRIFT_TOLERANCE เท่า -> train ใหม่ทั้งหมด
+FINETUNE_STEPS = 50
+FINETUNE_LR = 0.0005
+REPLAY_SIZE = 64
+DRIFT_WINDOW = 20       # จำนวน window ล่าสุดที่ใช้วัด drift (อย่างน้อยเท่าจำนวนแท่งใหม่)
+DRIFT_TOLERANCE = 2.0
+SCALER_MARGIN = 0.25    # ราคาใหม่หลุดช่วง min/max ของ scaler เกินนี้ (หน่วย scaled) -> train ใหม่
+
+def _rmse(model, X, y):
+    with torch.no_grad():
+        preds = model(torch.from_numpy(np.ascontiguousarray(X))).numpy()
+    return math.sqrt(mean_squared_error(y, preds))
+
+def fine_tune(model, new_X, new_y, replay_X, replay_y, steps=FINETUNE_STEPS, replay_size=REPLAY_SIZE,
+              lr=FINETUNE_LR, seed=0):
+    # ทุก step ใช้ window ใหม่ทั้งหมด + replay ที่สุ่มจากของเก่า
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    rng = np.random.default_rng(seed)
+    replay_size = min(replay_size, len(replay_X))
+
+    model.train()
+    for step in range(steps):
+        pick = rng.integers(0, len(replay_X), size=replay_size)
+        x_batch = torch.from_numpy(np.concatenate([new_X, replay_X[pick]]))
+        y_batch = torch.from_numpy(np.concatenate([new_y, replay_y[pick]]))
+        loss = criterion(model(x_batch), y_batch)
+
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    model.eval()
+    return model
+
+def update_model(symbol, model, scaler, meta, window_size=10, period="1y", steps=FINETUNE_STEPS):
+    """fine-tune ด้วยแท่งที่มาหลัง fingerprint ล่าสุด คืน (model, scaler) หรือ None ถ้าควร train ใหม่"""
+    bars = fetch_series(symbol, period)
+    new = ModelRegistry.new_bar_count(meta, bars)
+    scaled = scaler.transform(bars.close.reshape(-1, 1)).astype(np.float32).ravel()
+    if new <= 0 or len(scaled) - new <= window_size + REPLAY_SIZE // 4:
+        return None
+    if scaled[-new:].max() > 1.0 + SCALER_MARGIN or scaled[-new:].min() < -SCALER_MARGIN:
+        print(f"⚠️ {symbol}: new prices outside scaler range")
+        return None
+
+    dataset = StockDataset(scaled, window_size)
+    recent = min(max(new, DRIFT_WINDOW), len(dataset) - REPLAY_SIZE // 4)
+    before = _rmse(model, dataset.X[-recent:], dataset.y[-recent:])
+    baseline = meta.get("metrics", {}).get("rmse", float("nan"))
+    if not before <= baseline * DRIFT_TOLERANCE:
+        print(f"⚠️ {symbol}: recent RMSE {before:.4f} vs trained {baseline:.4f}")
+        return None
+
+    fine_tune(model, dataset.X[-new:], dataset.y[-new:], dataset.X[:-new], dataset.y[:-new], steps=steps)
+    after = _rmse(model, dataset.X[-recent:], dataset.y[-recent:])
+    drift = {"new_bars": new, "rmse_before": before, "rmse_after": after, "baseline_rmse": baseline}
+    model_registry.update(symbol, model, scaler, ModelRegistry.fingerprint(bars, **meta["params"]), drift)
+    print(f"🔧 {symbol} fine-tuned on {new} new bars: RMSE {before:.4f} -> {after:.4f}")
+    return model, scaler
+
+def refresh_models(symbols, window_size=10, epochs=100, batch_size=16, period="1y"):
+    """อัปเดตโมเดลรายวันของทั้ง universe: คืนตาราง action (cached/updated/trained) และเวลาต่อ symbol"""
+    symbols = [s.upper() for s in symbols]
+    prefetch(symbols, period=period)
+    rows = []
+    for symbol in symbols:
+        trains, updates = model_registry.trains, model_registry.updates
+        started = time.perf_counter()
+        get_model(symbol, window_size, epochs, batch_size, period)
+        action = ("trained" if model_registry.trains > trains
+                  else "updated" if model_registry.updates > updates else "cached")
+        rows.append({"symbol": symbol, "action": action, "seconds": time.perf_counter() - started})
+    return pd.DataFrame(rows).set_index("symbol")
+
+# ==================== Load Model & Scaler ====================
+def get_model(symbol, window_size=10, epochs=100, batch_size=16, period="1y"):
+    """คืน (model, scaler) จาก registry: ใช้ของในหน่วยความจำ/ดิสก์ถ้า fingerprint ยังตรง มีแท่งใหม่ -> fine-tune ไม่งั้น train ใหม่"""
+    symbol = symbol.upper()
+    return model_registry.get_model(
+        fetch_series(symbol, period),
+        model_params(window_size, epochs, batch_size, period),
+        factory=lambda: StockPriceModel(window_size),
+        trainer=lambda: train_model(symbol, window_size, epochs, batch_size, period),
+        updater=lambda model, scaler, meta: update_model(symbol, model, scaler, meta, window_size, period),
+    )
+
+def load_model(symbol, window_size=10, epochs=100, batch_size=16, period="1y"):
+    params = model_params(window_size, epochs, batch_size, period)
+    entry = model_registry.load(symbol, params, lambda: StockPriceModel(window_size))
+    return entry[0] if entry else None
+
+def load_scaler(symbol, window_size=10, epochs=100, batch_size=16, period="1y"):
+    # artifact รุ่นเก่า (_scaler.npy เก็บแค่ data_max_) ไม่นับ เพราะ min ไม่ใช่ 0 เสมอไป
+    params = model_params(window_size, epochs, batch_size, period)
+    path = model_registry.artifact_path(symbol, params, "scaler.joblib")
+    return joblib.load(path) if os.path.exists(path) else None
 #test linear regression
 def liner_regression(symbol, window_size=10, plot=True):
-    df = fetch_data(symbol)
-    close_prices = df["Close"].values.reshape(-1, 1)
+    bars = fetch_series(symbol)
+    close_prices = bars.close.reshape(-1, 1)
 
-    scaler = load_scaler(symbol)
+    scaler = load_scaler(symbol, window_size)
     if scaler is None:
         scaler = MinMaxScaler()
         close_prices = scaler.fit_transform(close_prices).flatten()
@@ -137,8 +384,9 @@ def liner_regression(symbol, window_size=10, plot=True):
 
     if plot:
         plt.figure(figsize=(12, 6))
-        plt.plot(df['Date'], y, label='Actual Price')
-        plt.plot(df['Date'], y_pred, label='Linear Regression', linestyle='--')
+        dates = bars.dates()
+        plt.plot(dates, y, label='Actual Price')
+        plt.plot(dates, y_pred, label='Linear Regression', linestyle='--')
         plt.title(f"{symbol} - Linear Regression")
         plt.xlabel("Date")
         plt.ylabel("Price")
@@ -150,14 +398,9 @@ def liner_regression(symbol, window_size=10, plot=True):
     return model
 # ==================== Price Prediction ====================
 def predict_next_price(symbol, window_size=10, plot=True):
-    df = fetch_data(symbol)
-    close_prices = df["Close"].values.reshape(-1, 1)
-
-    scaler = load_scaler(symbol)
-    model = load_model(symbol, window_size)
+    close_prices = fetch_series(symbol).close.reshape(-1, 1)
 
-    if model is None or scaler is None:
-        model, scaler = train_model(symbol, window_size)
+    model, scaler = get_model(symbol, window_size)
 
     scaled_prices = scaler.transform(close_prices).flatten()
     recent = scaled_prices[-window_size:]
@@ -182,18 +425,176 @@ def predict_next_price(symbol, window_size=10, plot=True):
 
     return predicted_price
 
+# ==================== Global Model ====================
+# 1 โมเดลสำหรับทั้ง watchlist: normalize ราคาแต่ละ symbol ด้วย min/max ของตัวเอง แล้ว train รวมกัน
+# checkpoint เก่าเกิน MAX_AGE, มีแท่งใหม่เกิน GLOBAL_MAX_NEW_BARS หรือไม่รู้จัก symbol ที่ขอ -> train ใหม่
+GLOBAL_MODEL_PATH = "Model/global_model.pt"
+GLOBAL_MAX_NEW_BARS = 5
+
+def _minmax(close):
+    low, high = float(np.nanmin(close)), float(np.nanmax(close))
+    return low, (high - low) or 1.0
+
+def train_global_model(symbols, window_size=10, steps=2000, batch_size=1024, period="2y", embed_dim=8,
+                       lr=0.001, seed=0, path=GLOBAL_MODEL_PATH, horizon=1, holdout=0):
+    # holdout: ไม่ใช้ n แท่งล่าสุดของแต่ละ symbol ตอน train (เก็บไว้วัด error แบบ out-of-sample)
+    symbols = [s.upper() for s in symbols]
+    if len(symbols) > 1:
+        prefetch(symbols, period)
+    series, used, lows, spans, last_ts, skipped = [], [], [], [], [], []
+    for symbol in symbols:
+        try:
+            bars = fetch_series(symbol, period)
+        except Exception as e:
+            print(f"⚠ {symbol}: {e}")
+            skipped.append(symbol)
+            continue
+        close = bars.close
+        if len(close) - holdout < window_size + horizon:
+            skipped.append(symbol)
+            continue
+        train_close = close[:len(close) - holdout]
+        low, span = _minmax(train_close)  # min/max จากช่วง train เท่านั้น ช่วง holdout ไม่รั่วเข้า normalization
+        series.append((train_close - low) / span)
+        used.append(symbol)
+        lows.append(low)
+        spans.append(span)
+        last_ts.append(bars.last_ts)
+    if not used:
+        raise ValueError("No symbol has enough history to train on")
+
+    dataset = MultiSymbolDataset(series, window_size, horizon)
+    dataset.return_ids = embed_dim > 0
+    torch.manual_seed(seed)
+    model = GlobalPriceModel(window_size, len(used), embed_dim, horizon)
+    fit_steps(model, dataset, steps=steps, batch_size=batch_size, lr=lr, seed=seed)
+
+    meta = {"symbols": used, "low": lows, "span": spans, "window_size": window_size, "embed_dim": embed_dim,
+            "horizon": horizon, "holdout": holdout, "last_ts": last_ts, "skipped": skipped, "trained_at": time.time()}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.save({"state": model.state_dict(), **meta}, path)
+    print(f"✅ Global model trained on {len(used)} symbols ({len(dataset)} windows)")
+    return model, meta
+
+def load_global_model(path=GLOBAL_MODEL_PATH):
+    if not os.path.exists(path):
+        return None, None
+    checkpoint = torch.load(path)
+    meta = {k: v for k, v in checkpoint.items() if k != "state"}
+    model = GlobalPriceModel(meta["window_size"], len(meta["symbols"]), meta["embed_dim"], meta.get("horizon", 1))
+    model.load_state_dict(checkpoint["state"])
+    model.eval()
+    return model, meta
+
+def global_inputs(symbols, meta, period="1y", min_bars=None):
+    """ราคาที่ normalize แบบเดียวกับตอน train ของทุก symbol ที่มีข้อมูลพอ
+    คืน (symbols, list ของ array, embedding ids, lows, spans) symbol ที่โมเดลไม่รู้จักใช้ id 0 และ min/max ของตัวเอง"""
+    min_bars = min_bars or meta["window_size"]
+    known = {s: i for i, s in enumerate(meta["symbols"])}
+    if len(symbols) > 1:
+        prefetch(symbols, period)
+
+    series, ids, lows, spans, names = [], [], [], [], []
+    for symbol in symbols:
+        close = fetch_series(symbol, period).close
+        if len(close) < min_bars:
+            continue
+        if symbol in known:
+            i = known[symbol]
+            low, span = meta["low"][i], meta["span"][i]
+        else:
+            low, span = _minmax(close)
+        series.append((close - low) / span)
+        ids.append(known.get(symbol, -1) + 1)
+        lows.append(low)
+        spans.append(span)
+        names.append(symbol)
+    return names, series, ids, np.array(lows), np.array(spans)
+
+def global_stale_reason(meta, symbols, period="1y", max_new_bars=GLOBAL_MAX_NEW_BARS, max_age=MAX_AGE):
+    """เหตุผลที่ global model ใช้กับ symbols นี้ไม่ได้แล้ว หรือ None
+    symbol ที่เคยลอง train แต่ข้อมูลไม่พอ (meta["skipped"]) ไม่นับว่าขาด"""
+    if meta is None:
+        return "no model"
+    if time.time() - meta.get("trained_at", 0) > max_age:
+        return "too old"
+    trained_to = dict(zip(meta["symbols"], meta.get("last_ts", [])))
+    skipped = set(meta.get("skipped", []))
+    for symbol in symbols or ():
+        if symbol in skipped:
+            continue
+        if symbol not in trained_to:
+            return f"{symbol} not in model"
+        if int(np.count_nonzero(fetch_series(symbol, period).ts > trained_to[symbol])) > max_new_bars:
+            return "new bars"
+    return None
+
+def predict_next_prices(symbols, period="1y", path=GLOBAL_MODEL_PATH):
+    """ราคาปิดถัดไปของทุก symbol ใน forward pass เดียว (train global model ใหม่ถ้ายังไม่มีหรือ stale)"""
+    symbols = [s.upper() for s in symbols]
+    model, meta = load_global_model(path)
+    reason = global_stale_reason(meta, symbols, period)
+    if reason is not None:
+        print(f"🔁 Training global model: {reason}")
+        known = meta["symbols"] if meta else []
+        model, meta = train_global_model(list(dict.fromkeys(known + symbols)), path=path)
+    names, series, ids, lows, spans = global_inputs(symbols, meta, period)
+    if not names:
+        return pd.Series(dtype=float, name="predicted_close")
+
+    window_size = meta["window_size"]
+    x = torch.tensor(np.stack([s[-window_size:] for s in series]), dtype=torch.float32)
+    with torch.no_grad():
+        pred = model(x, torch.tensor(ids, dtype=torch.long)).numpy()[:, 0]
+    prices = pred * spans + lows
+    return pd.Series(prices, index=pd.Index(names, name="symbol"), name="predicted_close")
+
+# ==================== Binomial Prediction ====================
+def predict_price_binomial(symbol, days=30, steps=Binomial.STEPS, plot=True):
+    # การกระจายราคาอีก days วันทำการจาก CRR lattice (sigma/drift จากประวัติ 1 ปี)
+    bars = fetch_series(symbol)
+    sigma, drift = Binomial.estimate_volatility(bars.close)
+    spot = bars.close[-1:]
+    prices, probs = Binomial.terminal_distribution(spot, sigma, days / Binomial.TRADING_DAYS, steps, drift)
+    stats = Binomial.distribution_stats(prices, probs, spot)
+    expected = stats["expected"][0]
+
+    print(f"📈 {symbol} - Binomial expected price in {days} days: ${expected:.2f} (σ={sigma[0]:.1%})")
+    print(f"📊 {symbol} - 5%-95% range: ${stats['p5'][0]:.2f} - ${stats['p95'][0]:.2f}, P(up) = {stats['prob_up'][0]:.1%}")
+
+    if plot:
+        keep = probs[0] > 1e-6
+        plt.figure(figsize=(10, 5))
+        plt.plot(prices[0, keep], probs[0, keep], color='purple', label='Terminal distribution')
+        plt.axvline(spot[0], color='gray', linestyle='--', label='Current price')
+        plt.axvline(expected, color='red', label='Expected price')
+        plt.axvspan(stats['p5'][0], stats['p95'][0], color='orange', alpha=0.15, label='5%-95%')
+        plt.title(f"{symbol} - Binomial price distribution ({days} days)")
+        plt.xlabel("Price")
+        plt.ylabel("Probability")
+        plt.legend()
+        plt.grid(True)
+        plt.tight_layout()
+        plt.show()
+
+    return expected
+
+def predict_prices_binomial(symbols, days=30, steps=Binomial.STEPS):
+    # ทั้ง watchlist ในการคำนวณเดียว คืนตาราง symbol x (spot, sigma, expected, percentile, prob_up)
+    return Binomial.forecast(symbols, days=days, steps=steps)
+
 # ==================== RSI Prediction ====================
 def predict_rsi(symbol, plot=True):
-    data = fetch_data(symbol)
-    data['RSI'] = talib.RSI(data['Close'], timeperiod=14)
+    bars = fetch_series(symbol)
+    rsi = rsi_values(bars, timeperiod=14)
 
-    latest_rsi = data['RSI'].iloc[-1]
+    latest_rsi = rsi[-1]
     print(f"📈 {symbol} - Latest RSI: {latest_rsi:.2f}")
     print(f"📊 {symbol} - RSI Interpretation: {'Overbought' if latest_rsi > 70 else 'Oversold' if latest_rsi < 30 else 'Neutral'}")
 
     if plot:
         plt.figure(figsize=(10, 5))
-        plt.plot(data['Date'], data['RSI'], label='RSI', color='purple')
+        plt.plot(bars.dates(), rsi, label='RSI', color='purple')
         plt.axhline(70, color='red', linestyle='--', label='Overbought (70)')
         plt.axhline(30, color='green', linestyle='--', label='Oversold (30)')
         plt.title(f"{symbol} - RSI (14)")
@@ -208,30 +609,38 @@ def predict_rsi(symbol, plot=True):
 
 # ==================== EMA Cross Detection ====================
 def detect_ema_cross(symbol, plot=True):
-    data = fetch_data(symbol)
-    data.set_index('Date', inplace=True)
+    bars = fetch_series(symbol)
 
-    data['EMA_12'] = talib.EMA(data['Close'], timeperiod=12)
-    data['EMA_26'] = talib.EMA(data['Close'], timeperiod=26)
+    ema_12 = ema_values(bars, timeperiod=12)
+    ema_26 = ema_values(bars, timeperiod=26)
 
-    data['Signal'] = np.where(data['EMA_12'] > data['EMA_26'], 1, 0)
-    data['Cross'] = data['Signal'].diff()
+    signal = (ema_12 > ema_26).astype(np.int8)
+    cross = np.diff(signal, prepend=signal[:1])
+    hits = np.flatnonzero(cross)
 
-    cross_days = data[data['Cross'] != 0]
+    # DataFrame สร้างเฉพาะแถวที่เกิด cross สำหรับแสดงผล
+    cross_days = pd.DataFrame({
+        'Close': bars.close[hits],
+        'EMA_12': ema_12[hits],
+        'EMA_26': ema_26[hits],
+        'Signal': signal[hits],
+        'Cross': cross[hits],
+    }, index=bars.dates()[hits])
 
     if not cross_days.empty:
         print(f"📈 {symbol} - EMA Cross detected on:")
-        for date in cross_days.index:
-            cross_type = "Bullish" if cross_days.loc[date, 'Cross'] == 1 else "Bearish"
+        for date, value in zip(cross_days.index, cross_days['Cross']):
+            cross_type = "Bullish" if value == 1 else "Bearish"
             print(f"  - {date.date()}: {cross_type}")
     else:
         print(f"📉 {symbol} - No EMA Cross in the last year.")
 
     if plot:
+        dates = bars.dates()
         plt.figure(figsize=(14, 7))
-        plt.plot(data.index, data['Close'], label='Close Price', alpha=0.3)
-        plt.plot(data.index, data['EMA_12'], label='EMA 12', color='blue')
-        plt.plot(data.index, data['EMA_26'], label='EMA 26', color='orange')
+        plt.plot(dates, bars.close, label='Close Price', alpha=0.3)
+        plt.plot(dates, ema_12, label='EMA 12', color='blue')
+        plt.plot(dates, ema_26, label='EMA 26', color='orange')
 
         bullish = cross_days[cross_days['Cross'] == 1]
         bearish = cross_days[cross_days['Cross'] == -1]
@@ -250,14 +659,15 @@ def detect_ema_cross(symbol, plot=True):
 
 # ==================== MACD ====================
 def plot_macd(symbol, plot=True):
-    data = fetch_data(symbol)
-    macd, macdsignal, macdhist = talib.MACD(data['Close'], fastperiod=12, slowperiod=26, signalperiod=9)
+    bars = fetch_series(symbol)
+    macd, macdsignal, macdhist = macd_values(bars, fastperiod=12, slowperiod=26, signalperiod=9)
 
     if plot:
+        dates = bars.dates()
         plt.figure(figsize=(12, 6))
-        plt.plot(data['Date'], macd, label='MACD', color='blue')
-        plt.plot(data['Date'], macdsignal, label='Signal Line', color='red')
-        plt.bar(data['Date'], macdhist, label='Histogram', color='grey')
+        plt.plot(dates, macd, label='MACD', color='blue')
+        plt.plot(dates, macdsignal, label='Signal Line', color='red')
+        plt.bar(dates, macdhist, label='Histogram', color='grey')
         plt.title(f"{symbol} - MACD")
         plt.xlabel("Date")
         plt.ylabel("MACD Value")
@@ -270,39 +680,40 @@ def plot_macd(symbol, plot=True):
 
 # ==================== Doji Candlestick ====================
 def detect_doji(symbol, plot=True):
-    data = fetch_data(symbol)
-    body = abs(data['Close'] - data['Open'])
-    range_ = data['High'] - data['Low']
-    doji = (body / range_) < 0.1  # body less than 10% of range
+    bars = fetch_series(symbol)
+    body = np.abs(bars.close - bars.open)
+    range_ = bars.high - bars.low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        doji = (body / range_) < 0.1  # body less than 10% of range
 
-    dates = data['Date'][doji]
+    dates = bars.dates()[doji]
 
     if plot:
         mc = mpf.make_marketcolors(up='g', down='r', inherit=True)
         s = mpf.make_mpf_style(marketcolors=mc)
         addplots = [mpf.make_addplot(doji.astype(int), type='bar', panel=1, color='b', alpha=0.5)]
-        mpf.plot(data.set_index('Date'), type='candle', style=s, addplot=addplots, title=f"{symbol} - Doji Candles")
+        mpf.plot(bars.to_frame(), type='candle', style=s, addplot=addplots, title=f"{symbol} - Doji Candles")
 
     print(f"🕯️ {symbol} - Detected Doji on dates: {[str(d.date()) for d in dates.tolist()]}")
     return dates.tolist()
 
 # ==================== Hammer Candlestick ====================
 def detect_hammer(symbol, plot=True):
-    data = fetch_data(symbol)
+    bars = fetch_series(symbol)
 
-    body = abs(data['Close'] - data['Open'])
-    lower_shadow = data['Open'].where(data['Close'] > data['Open'], data['Close']) - data['Low']
-    upper_shadow = data['High'] - data['Close'].where(data['Close'] > data['Open'], data['Open'])
+    body = np.abs(bars.close - bars.open)
+    lower_shadow = np.minimum(bars.open, bars.close) - bars.low
+    upper_shadow = bars.high - np.maximum(bars.open, bars.close)
 
     hammer = (lower_shadow >= 2 * body) & (upper_shadow <= 0.1 * body)
 
-    dates = data['Date'][hammer]
+    dates = bars.dates()[hammer]
 
     if plot:
         mc = mpf.make_marketcolors(up='g', down='r', inherit=True)
         s = mpf.make_mpf_style(marketcolors=mc)
         addplots = [mpf.make_addplot(hammer.astype(int), type='bar', panel=1, color='m', alpha=0.5)]
-        mpf.plot(data.set_index('Date'), type='candle', style=s, addplot=addplots, title=f"{symbol} - Hammer Candles")
+        mpf.plot(bars.to_frame(), type='candle', style=s, addplot=addplots, title=f"{symbol} - Hammer Candles")
 
     print(f"🔨 {symbol} - Detected Hammer on dates: {[str(d.date()) for d in dates.tolist()]}")
     return dates.tolist()
@@ -310,13 +721,14 @@ def detect_hammer(symbol, plot=True):
 
 # ==================== Aroon Indicator ====================
 def aroon_indicator(symbol, period=14, plot=True):
-    data = fetch_data(symbol)
-    aroon_up, aroon_down = talib.AROON(data['High'], data['Low'], timeperiod=period)
+    bars = fetch_series(symbol)
+    aroon_down, aroon_up = aroon_values(bars, timeperiod=period)
 
     if plot:
+        dates = bars.dates()
         plt.figure(figsize=(12, 6))
-        plt.plot(data['Date'], aroon_up, label='Aroon Up', color='green')
-        plt.plot(data['Date'], aroon_down, label='Aroon Down', color='red')
+        plt.plot(dates, aroon_up, label='Aroon Up', color='green')
+        plt.plot(dates, aroon_down, label='Aroon Down', color='red')
         plt.title(f"{symbol} - Aroon Indicator")
         plt.xlabel("Date")
         plt.ylabel("Aroon Value")
@@ -329,12 +741,12 @@ def aroon_indicator(symbol, period=14, plot=True):
 
 # ==================== Momentum ====================
 def momentum(symbol, period=10, plot=True):
-    data = fetch_data(symbol)
-    mom = talib.MOM(data['Close'], timeperiod=period)
+    bars = fetch_series(symbol)
+    mom = mom_values(bars, timeperiod=period)
 
     if plot:
         plt.figure(figsize=(12, 6))
-        plt.plot(data['Date'], mom, label=f'Momentum ({period})', color='purple')
+        plt.plot(bars.dates(), mom, label=f'Momentum ({period})', color='purple')
         plt.title(f"{symbol} - Momentum")
         plt.xlabel("Date")
         plt.ylabel("Momentum")
@@ -345,18 +757,71 @@ def momentum(symbol, period=10, plot=True):
 
     return mom
 
-# ==================== PEG Ratio Scraper ====================
-def fetch_peg_ratio(symbol):
-    url = f"https://finance.yahoo.com/quote/{symbol}/key-statistics?p={symbol}"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    res = requests.get(url, headers=headers)
+# ==================== Rate of Change ====================
+def calculate_Roc(symbol, period=10, plot=True):
+    bars = fetch_series(symbol)
+    roc = roc_values(bars, timeperiod=period)
+
+    if plot:
+        plt.figure(figsize=(12, 6))
+        plt.plot(bars.dates(), roc, label=f'ROC ({period})', color='teal')
+        plt.axhline(0, color='grey', linestyle='--')
+        plt.title(f"{symbol} - Rate of Change")
+        plt.xlabel("Date")
+        plt.ylabel("ROC (%)")
+        plt.legend()
+        plt.grid(True)
+        plt.tight_layout()
+        plt.show()
+
+    return roc
+
+# ==================== Williams %R ====================
+def calculate_WILLR(symbol, period=14, plot=True):
+    bars = fetch_series(symbol)
+    willr = willr_values(bars, timeperiod=period)
 
-    soup = BeautifulSoup(res.text, 'html.parser')
-    peg_ratio = None
-    for tr in soup.find_all('tr'):
-        if 'PEG Ratio' in tr.text:
-            peg_ratio = tr.find_all('td')[1].text.strip()
-            break
+    if plot:
+        plt.figure(figsize=(12, 6))
+        plt.plot(bars.dates(), willr, label=f'Williams %R ({period})', color='brown')
+        plt.axhline(-20, color='red', linestyle='--', label='Overbought (-20)')
+        plt.axhline(-80, color='green', linestyle='--', label='Oversold (-80)')
+        plt.title(f"{symbol} - Williams %R")
+        plt.xlabel("Date")
+        plt.ylabel("%R")
+        plt.legend()
+        plt.grid(True)
+        plt.tight_layout()
+        plt.show()
 
+    return willr
+
+# ==================== Batched Indicators ====================
+# ตัวเลือกในหน้า Prediction ที่คำนวณผ่าน IndicatorEngine ได้ทีเดียวทั้ง watchlist
+ENGINE_OPTIONS = {
+    "RSI": ("rsi",),
+    "MACD": ("macd",),
+    "Aroon": ("aroon",),
+    "Trending": ("mom",),
+    "ROC": ("roc",),
+    "WILLR": ("willr",),
+}
+
+def batch_indicators(symbols, indicators=IndicatorEngine.INDICATORS, period="1y", params=None):
+    panel = prefetch(symbols, period, panel=True)
+    if panel is None or panel.empty:
+        return {}
+    return IndicatorEngine.compute_panel(panel, indicators, params)
+
+def latest_values(results):
+    # ตาราง symbol x indicator ของแท่งล่าสุด
+    return pd.DataFrame({name: frame.iloc[-1] for name, frame in results.items()})
+
+# ==================== PEG Ratio ====================
+def fetch_peg_ratio(symbol):
+    peg_ratio = get_peg_ratio(symbol)
     print(f"🔢 {symbol} - PEG Ratio: {peg_ratio}")
     return peg_ratio
+
+def fetch_peg_ratios(symbols):
+    return get_peg_ratios(symbols)
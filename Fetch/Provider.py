@@ -0,0 +1,240 @@
+import os
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+# ==================== Market Data Providers ====================
+# ทุกโมดูลใน Fetch ดึงข้อมูลผ่าน get_provider() แทนการเรียก yfinance ตรงๆ
+# เลือก backend ด้วย env SOMESTOCK_PROVIDER=yfinance|local (ค่าเริ่มต้น yfinance)
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+_FIELD_STREAMS = {field: i + 1 for i, field in enumerate(OHLCV)}
+
+
+class DataProvider:
+    name = "base"
+
+    def history(self, symbol, start=None, end=None, interval="1d"):
+        raise NotImplementedError
+
+    def download(self, symbols, start=None, interval="1d"):
+        frames = {}
+        for symbol in symbols:
+            df = self.history(symbol, start=start, interval=interval)
+            if df is not None and not df.empty:
+                frames[symbol] = df
+        return frames
+
+    def financials(self, symbol):
+        return {"financials": pd.DataFrame(), "balance_sheet": pd.DataFrame(), "cashflow": pd.DataFrame()}
+
+    def peg_ratio(self, symbol):
+        return None
+
+
+# ==================== yfinance ====================
+_PEG_LABEL = re.compile(r"PEG Ratio", re.IGNORECASE)
+_TD_CELL = re.compile(r"<td[^>]*>(.*?)</td>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def parse_peg_ratio(html):
+    # หา label "PEG Ratio" ตรงๆ แล้วอ่าน <td> ถัดไปในแถวเดียวกัน ไม่ต้อง parse ทั้งหน้า
+    match = _PEG_LABEL.search(html)
+    if match is None:
+        return None
+    row_end = html.find("</tr>", match.end())
+    segment = html[match.end():row_end if row_end != -1 else None]
+    cell = _TD_CELL.search(segment)
+    if cell is None:
+        return None
+    value = _TAG.sub("", cell.group(1)).strip()
+    return value or None
+
+
+class YFinanceProvider(DataProvider):
+    name = "yfinance"
+
+    def history(self, symbol, start=None, end=None, interval="1d"):
+        import yfinance as yf
+        if start is None:
+            return yf.Ticker(symbol).history(period="max", interval=interval)
+        return yf.Ticker(symbol).history(start=start, end=end, interval=interval)
+
+    def download(self, symbols, start=None, interval="1d"):
+        import yfinance as yf
+        kwargs = dict(interval=interval, group_by="ticker", auto_adjust=True, actions=True,
+                      threads=True, progress=False)
+        if start is None:
+            raw = yf.download(symbols, period="max", **kwargs)
+        else:
+            raw = yf.download(symbols, start=start, **kwargs)
+        frames = {}
+        if raw is None or raw.empty:
+            return frames
+        for symbol in symbols:
+            if symbol not in raw.columns.get_level_values(0):
+                continue
+            df = raw[symbol].dropna(how="all")
+            df.columns.name = None
+            df.index.name = "Date" if interval.endswith(("d", "wk", "mo")) else "Datetime"
+            if not df.empty:
+                frames[symbol] = df
+        return frames
+
+    def financials(self, symbol):
+        import yfinance as yf
+        stock = yf.Ticker(symbol)
+        return {
+            "financials": stock.financials,
+            "balance_sheet": stock.balance_sheet,
+            "cashflow": stock.cashflow,
+        }
+
+    def peg_ratio(self, symbol):
+        import requests
+        url = f"https://finance.yahoo.com/quote/{symbol}/key-statistics?p={symbol}"
+        res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
+        res.raise_for_status()
+        return parse_peg_ratio(res.text)
+
+
+# ==================== Local replay / synthetic ====================
+class LocalProvider(DataProvider):
+    """เล่นซ้ำไฟล์ที่บันทึกไว้ ({root}/{interval}/{SYMBOL}.csv) ถ้าไม่มีไฟล์จะสร้าง OHLCV สังเคราะห์แบบ deterministic"""
+    name = "local"
+
+    def __init__(self, root=None, seed=0, origin="2000-01-03", tz="America/New_York"):
+        self.root = root
+        self.seed = seed
+        self.origin = pd.Timestamp(origin)
+        self.tz = tz
+
+    def history(self, symbol, start=None, end=None, interval="1d"):
+        df = self._replay(symbol, interval)
+        if df is None:
+            if interval != "1d":
+                return pd.DataFrame(columns=OHLCV)
+            df = self.synthetic(symbol, end=end)
+        return _clip(df, start, end)
+
+    def record(self, symbol, df, interval="1d"):
+        if not self.root:
+            raise ValueError("LocalProvider.root is not set")
+        folder = os.path.join(self.root, interval)
+        os.makedirs(folder, exist_ok=True)
+        df.to_csv(os.path.join(folder, f"{symbol.upper()}.csv"))
+
+    def _replay(self, symbol, interval):
+        if not self.root:
+            return None
+        path = os.path.join(self.root, interval, f"{symbol.upper()}.csv")
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert(self.tz)
+        df.index.name = "Date"
+        return df
+
+    def synthetic(self, symbol, end=None):
+        # เดินจาก origin คงที่เสมอ ค่าของแต่ละวันจึงไม่เปลี่ยนตาม end ที่ขอ
+        dates = self._calendar(end)
+        bars = self._synthetic_arrays(symbol, len(dates))
+        bars["Dividends"] = 0.0
+        bars["Stock Splits"] = 0.0
+        index = pd.DatetimeIndex(dates, name="Date").tz_localize(self.tz)
+        return pd.DataFrame(bars, index=index)
+
+    def synthetic_panel(self, symbols, end=None, years=None):
+        # สร้างข้อมูลขนาดใหญ่ (เช่น 5,000 symbols x 20 ปี) เป็น array (symbols x bars) โดยไม่ผ่าน DataFrame
+        dates = self._calendar(end)
+        n = len(dates)
+        first = 0
+        if years is not None:
+            cutoff = dates[-1] - np.timedelta64(int(round(years * 365.25)), "D")
+            first = int(np.searchsorted(dates, cutoff))
+        panel = {f: np.empty((len(symbols), n - first)) for f in OHLCV}
+        for row, symbol in enumerate(symbols):
+            bars = self._synthetic_arrays(symbol, n)
+            for f in OHLCV:
+                panel[f][row] = bars[f][first:]
+        index = pd.DatetimeIndex(dates[first:], name="Date").tz_localize(self.tz)
+        return index, panel
+
+    def _calendar(self, end):
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.today()
+        end = end.tz_localize(None) if end.tzinfo is not None else end
+        days = np.arange(self.origin.to_datetime64().astype("datetime64[D]"),
+                         end.normalize().to_datetime64().astype("datetime64[D]") + 1)
+        return days[np.is_busday(days)]
+
+    def _synthetic_arrays(self, symbol, n):
+        # แต่ละ field มี stream ของตัวเอง (seed, crc32(symbol), field) ค่าของวันที่ i จึงไม่ขึ้นกับ n/end
+        key = zlib.crc32(symbol.upper().encode())
+        rng = np.random.default_rng([self.seed, key])
+        base = rng.uniform(5.0, 500.0)
+        mu = rng.normal(0.0003, 0.0004)
+        sigma = rng.uniform(0.008, 0.035)
+
+        def stream(field):
+            return np.random.default_rng([self.seed, key, _FIELD_STREAMS[field]])
+
+        log_ret = stream("Close").normal(mu - 0.5 * sigma ** 2, sigma, n)
+        close = base * np.exp(np.cumsum(log_ret))
+        gap = stream("Open").normal(0.0, sigma * 0.3, n)
+        open_ = np.concatenate(([base], close[:-1])) * np.exp(gap)
+        high_wick = np.abs(stream("High").normal(0.0, sigma * 0.5, n))
+        low_wick = np.abs(stream("Low").normal(0.0, sigma * 0.5, n))
+        return {
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1.0 + high_wick),
+            "Low": np.minimum(open_, close) * (1.0 - low_wick),
+            "Close": close,
+            "Volume": np.round(stream("Volume").lognormal(13.0, 0.6, n)),
+        }
+
+    def check_replay(self, symbols, ends=("2020-01-10", "2020-06-10", None)):
+        # วันเดียวกันต้องได้แท่งเดียวกันไม่ว่าจะขอ end เท่าไหร่ (BarStore ต่อ delta ได้โดยไม่เพี้ยน)
+        for symbol in symbols:
+            frames = [self.synthetic(symbol, end=end) for end in ends]
+            shortest = min(frames, key=len)
+            for df in frames:
+                shared = df.loc[shortest.index, OHLCV]
+                if not np.array_equal(shared.to_numpy(), shortest[OHLCV].to_numpy()):
+                    return False
+        return True
+
+def _clip(df, start, end):
+    if df is None or df.empty:
+        return df
+    index = df.index
+    mask = np.ones(len(df), dtype=bool)
+    for bound, keep in ((start, lambda ts: index >= ts), (end, lambda ts: index < ts)):
+        if bound is None:
+            continue
+        ts = pd.Timestamp(bound)
+        if index.tz is not None:
+            ts = ts.tz_localize(index.tz) if ts.tzinfo is None else ts.tz_convert(index.tz)
+        mask &= keep(ts)
+    return df[mask]
+
+
+# ==================== Selection ====================
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        kind = os.environ.get("SOMESTOCK_PROVIDER", "yfinance").lower()
+        if kind == "local":
+            _provider = LocalProvider(root=os.environ.get("SOMESTOCK_REPLAY_DIR"))
+        else:
+            _provider = YFinanceProvider()
+    return _provider
+
+
+def set_provider(provider):
+    global _provider
+    _provider = provider
+    return provider
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from Fetch.BarStore import load_panel
+from Fetch.Manage_FAV import loadfave
+
+# ==================== Monte Carlo Portfolio Risk ====================
+# ประมาณ mean/covariance ของ log return รายวันจากประวัติใน store แล้วจำลอง path ที่สัมพันธ์กันด้วย Cholesky
+# จำลองเป็น chunk เพื่อคุมหน่วยความจำ แต่ละ chunk มี seed ของตัวเองจาก SeedSequence.spawn
+# ผลลัพธ์จึงเหมือนเดิมทุกครั้งไม่ว่าจะรันใน process เดียวหรือหลาย process
+CHUNK_ELEMENTS = 4_000_000  # จำนวนเลขสุ่มต่อ chunk (~32MB float64)
+LEVELS = (0.95, 0.99)
+MIN_OVERLAP = 120  # จำนวนวันที่มี return ร่วมกันขั้นต่ำของทั้งพอร์ต
+
+
+def portfolio_weights(favorites, weights=None):
+    """favorites: list ของ symbol หรือ dict symbol -> น้ำหนัก (ไฟล์รายการโปรดแบบมีน้ำหนัก)"""
+    if isinstance(favorites, dict):
+        symbols, weights = list(favorites), list(favorites.values())
+    else:
+        symbols = list(favorites)
+    symbols = [s.upper() for s in symbols]
+    w = np.ones(len(symbols)) if weights is None else np.asarray(weights, dtype=np.float64)
+    if len(w) != len(symbols) or not len(symbols) or w.sum() == 0:
+        raise ValueError("weights must match symbols and not sum to zero")
+    return symbols, w / w.sum()
+
+
+def estimate(symbols, period="2y", min_overlap=MIN_OVERLAP):
+    """คืน (symbols ที่มีข้อมูล, mean, covariance) ของ log return รายวัน
+    symbol ที่มี return น้อยกว่า min_overlap วัน (เช่นเพิ่งเข้าตลาด) ถูกตัดออกพร้อมแจ้ง
+    แทนที่จะตัดประวัติของทุกตัวให้สั้นตามตัวที่สั้นที่สุด"""
+    panel = load_panel(symbols, period=period, fields=("Close",))
+    if panel.empty:
+        raise ValueError("No price history for the requested symbols")
+    close = panel["Close"].reindex(columns=[s for s in symbols if s in panel["Close"].columns])
+    returns = np.log(close).diff().iloc[1:]
+    counts = returns.count()
+    short = list(counts.index[counts < min_overlap])
+    if short:
+        print(f"⚠️ Dropped from risk estimate (fewer than {min_overlap} days of returns): {', '.join(short)}")
+        returns = returns.drop(columns=short)
+    returns = returns.dropna(how="any")
+    if len(returns.columns) and len(returns) < min_overlap:
+        raise ValueError(f"Only {len(returns)} overlapping return days for the portfolio (need {min_overlap})")
+    return list(returns.columns), returns.mean().to_numpy(), returns.cov().to_numpy()
+
+
+def cholesky(cov):
+    # covariance จากข้อมูลจริงอาจ semi-definite (หุ้นที่เคลื่อนไหวเหมือนกัน) -> เติม jitter ที่แนวทแยง
+    jitter = 0.0
+    scale = float(np.mean(np.diag(cov))) or 1.0
+    for _ in range(8):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 10
+    raise np.linalg.LinAlgError("Covariance matrix is not positive definite")
+
+
+def _simulate_chunk(seed, n_paths, mu, chol, weights, horizon):
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((n_paths, horizon, len(mu)))
+    log_ret = mu + z @ chol.T
+    # rebalance ทุกวันตามน้ำหนัก: ผลตอบแทนพอร์ต = ผลรวมถ่วงน้ำหนักของ simple return
+    port = np.expm1(log_ret) @ weights
+    value = np.cumprod(1.0 + port, axis=1)
+    peak = np.maximum(np.maximum.accumulate(value, axis=1), 1.0)
+    drawdown = (value / peak - 1.0).min(axis=1)
+    return value[:, -1] - 1.0, np.minimum(drawdown, 0.0)
+
+
+def simulate(mu, cov, weights, horizon=20, paths=200_000, seed=None, workers=1):
+    """คืน (ผลตอบแทน ณ วันสุดท้าย, max drawdown) ของทุก path"""
+    mu = np.asarray(mu, dtype=np.float64)
+    chol = cholesky(np.asarray(cov, dtype=np.float64))
+    weights = np.asarray(weights, dtype=np.float64)
+    per_chunk = max(1, CHUNK_ELEMENTS // (horizon * len(mu)))
+    sizes = [min(per_chunk, paths - start) for start in range(0, paths, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(s, n, mu, chol, weights, horizon) for s, n in zip(seeds, sizes)]
+
+    if workers and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        parts = [_simulate_chunk(*a) for a in args]
+    returns = np.concatenate([p[0] for p in parts])
+    drawdowns = np.concatenate([p[1] for p in parts])
+    return returns, drawdowns
+
+
+def var_cvar(returns, level=0.95):
+    """VaR/CVaR เป็นขาดทุน (ค่าบวก) ที่ระดับความเชื่อมั่น level"""
+    cutoff = np.quantile(returns, 1.0 - level)
+    tail = returns[returns <= cutoff]
+    return -cutoff, -tail.mean() if len(tail) else -cutoff
+
+
+def summarize(returns, drawdowns, levels=LEVELS):
+    report = {
+        "paths": len(returns),
+        "expected_return": float(returns.mean()),
+        "prob_loss": float((returns < 0).mean()),
+    }
+    for level in levels:
+        var, cvar = var_cvar(returns, level)
+        pct = int(round(level * 100))
+        report[f"var_{pct}"] = float(var)
+        report[f"cvar_{pct}"] = float(cvar)
+    for q in (0.5, 0.95, 0.99):
+        report[f"drawdown_p{int(q * 100)}"] = float(-np.quantile(drawdowns, 1.0 - q))
+    return report
+
+
+def portfolio_risk(favorites, weights=None, horizon=20, paths=200_000, seed=42, period="2y", workers=1):
+    """favorites: path ไฟล์รายการโปรด, list ของ symbol หรือ dict symbol -> น้ำหนัก
+    คืน (report, weights ที่ใช้จริง, (returns, drawdowns))"""
+    if isinstance(favorites, str):
+        favorites = loadfave(favorites)
+    symbols, w = portfolio_weights(favorites, weights)
+    used, mu, cov = estimate(symbols, period)
+    if not used:
+        raise ValueError("No overlapping return history for the portfolio")
+    # symbol ที่ไม่มีข้อมูลถูกตัดออก แล้ว normalize น้ำหนักใหม่
+    w = pd.Series(w, index=symbols).reindex(used).to_numpy()
+    w = w / w.sum()
+    returns, drawdowns = simulate(mu, cov, w, horizon=horizon, paths=paths, seed=seed, workers=workers)
+    report = summarize(returns, drawdowns)
+    report["horizon"] = horizon
+    report["dropped"] = [s for s in symbols if s not in used]
+    return report, pd.Series(w, index=used, name="weight"), (returns, drawdowns)
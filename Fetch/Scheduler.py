@@ -0,0 +1,153 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================== Fetch Scheduler ====================
+# ทุก request ที่ออก network วิ่งผ่านที่นี่: thread pool จำกัดจำนวน, จำกัด requests/second,
+# retry แบบ exponential backoff, รวม request ที่ key ซ้ำกันขณะยังไม่เสร็จ และเก็บ latency
+# retry_empty=True (ต่อ call): ผลว่าง (DataFrame ว่าง / dict ว่าง) ก็ retry ด้วย ใช้กับ batch download
+# ที่ yfinance คืนผลว่างแทน error เมื่อโดน throttle; ค่าเริ่มต้นปิด เพราะผลว่างส่วนใหญ่เป็นของจริง
+# (ticker ผิด, ขอช่วงก่อนเข้าตลาด) ถ้า retry ครบแล้วยังว่างจะคืนผลว่างนั้น
+class RateLimiter:
+    def __init__(self, rate_per_sec, burst=None):
+        self.rate = float(rate_per_sec)
+        self.capacity = float(burst if burst is not None else max(1.0, rate_per_sec))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchScheduler:
+    def __init__(self, max_workers=8, rate_per_sec=5.0, retries=3, backoff=0.5, max_backoff=8.0, retry_empty=False):
+        self.retries = retries
+        self.retry_empty = retry_empty
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = RateLimiter(rate_per_sec)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._latencies = []
+        self.requests = 0
+        self.failures = 0
+        self.retried = 0
+        self.deduplicated = 0
+
+    def submit(self, key, fn, *args, retry_empty=None, **kwargs):
+        """ส่งงานเข้า pool; ถ้ามีงาน key เดียวกันกำลังรันอยู่จะได้ Future ตัวเดิมกลับไป"""
+        retry_empty = self.retry_empty if retry_empty is None else retry_empty
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            future = self._pool.submit(self._run, fn, args, kwargs, retry_empty)
+            self._inflight[key] = future
+        future.add_done_callback(lambda f, k=key: self._release(k, f))
+        return future
+
+    def call(self, key, fn, *args, retry_empty=None, **kwargs):
+        return self.submit(key, fn, *args, retry_empty=retry_empty, **kwargs).result()
+
+    def map(self, keys, fn, args_list):
+        futures = [self.submit(k, fn, *a) for k, a in zip(keys, args_list)]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _run(self, fn, args, kwargs, retry_empty):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self._record(time.perf_counter() - started, ok=False)
+                if attempt >= self.retries:
+                    raise
+            else:
+                empty = retry_empty and _is_empty(result)
+                self._record(time.perf_counter() - started, ok=not empty)
+                if not empty or attempt >= self.retries:
+                    return result
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+            time.sleep(delay * (0.5 + random.random() / 2))
+            attempt += 1
+            with self._lock:
+                self.retried += 1
+
+    def _record(self, latency, ok):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.failures += 1
+            self._latencies.append(latency)
+            if len(self._latencies) > 10000:
+                del self._latencies[:5000]
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            def pct(p):
+                return lat[min(len(lat) - 1, int(p * len(lat)))] if lat else 0.0
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "retried": self.retried,
+                "deduplicated": self.deduplicated,
+                "inflight": len(self._inflight),
+                "latency_mean": sum(lat) / len(lat) if lat else 0.0,
+                "latency_p50": pct(0.50),
+                "latency_p95": pct(0.95),
+                "latency_max": lat[-1] if lat else 0.0,
+            }
+
+
+def _is_empty(result):
+    if isinstance(result, dict):
+        return not result
+    return getattr(result, "empty", False) is True
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler()
+        return _scheduler
+
+
+def set_scheduler(scheduler):
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+    return scheduler
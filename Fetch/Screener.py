@@ -0,0 +1,197 @@
+import os
+import numpy as np
+import pandas as pd
+from Fetch import IndicatorEngine as engine
+from Fetch.BarSeries import BarSeries
+from Fetch.BarStore import load_history, load_many, load_panel
+from Fetch.Streaming import (StreamingAroon, StreamingMACD, StreamingMOM, StreamingROC, StreamingRSI,
+                             StreamingSMA, load_states, revise_indicators, save_states, seed_indicators,
+                             update_indicators)
+
+# ==================== Screener ====================
+# ตาราง snapshot ค่า indicator ล่าสุดของแต่ละ symbol (1 แถวต่อ symbol) สำหรับกรอง/เรียงทั้ง watchlist
+# build() คำนวณทุก symbol ทีเดียวด้วย IndicatorEngine, refresh() อัปเดตเฉพาะแท่งใหม่ด้วย Streaming indicator
+# ทั้งสองทางใช้แท่งจริงของแต่ละ symbol (ไม่ ffill วันหยุดของตลาดอื่น) ค่าจึงตรงกันแม้ปฏิทินต่างกัน
+# query ทำบนตารางในหน่วยความจำ ไม่คำนวณ indicator ใหม่ เช่น
+#   screener.query("rsi < 30 and close > ma_200", sort_by="roc")
+SNAPSHOT_DIR = os.path.join("Data", "screener")
+PARAMS = {"rsi": 14, "macd": (12, 26, 9), "aroon": 14, "mom": 10, "roc": 10, "ma": (20, 50, 200)}
+ENGINE_INDICATORS = ("rsi", "macd", "aroon", "mom", "roc", "ma")
+COLUMNS = (["date", "close", "change_pct", "rsi", "macd", "macd_signal", "macd_hist",
+            "aroon_up", "aroon_down", "aroon_osc", "mom", "roc"]
+           + [f"ma_{n}" for n in PARAMS["ma"]] + [f"dist_ma_{n}" for n in PARAMS["ma"]])
+
+
+def screener_indicators():
+    fast, slow, signal = PARAMS["macd"]
+    indicators = {
+        "change": StreamingROC(1),
+        "rsi": StreamingRSI(PARAMS["rsi"]),
+        "macd": StreamingMACD(fast, slow, signal),
+        "aroon": StreamingAroon(PARAMS["aroon"]),
+        "mom": StreamingMOM(PARAMS["mom"]),
+        "roc": StreamingROC(PARAMS["roc"]),
+    }
+    for n in PARAMS["ma"]:
+        indicators[f"ma_{n}"] = StreamingSMA(n)
+    return indicators
+
+
+def _frame(symbols, dates, close, values):
+    """values: dict ชื่อ -> array ค่าล่าสุดต่อ symbol"""
+    table = pd.DataFrame({"date": pd.DatetimeIndex(dates).as_unit("ns"), "close": np.asarray(close, dtype=np.float64)},
+                         index=pd.Index(symbols, name="symbol"))
+    for name in COLUMNS[2:]:
+        if name in values:
+            table[name] = np.asarray(values[name], dtype=np.float64)
+    table["aroon_osc"] = table["aroon_up"] - table["aroon_down"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for n in PARAMS["ma"]:
+            table[f"dist_ma_{n}"] = (table["close"] / table[f"ma_{n}"] - 1.0) * 100.0
+    return table[COLUMNS]
+
+
+def _streaming_values(indicators):
+    macd = indicators["macd"]
+    values = {
+        "change_pct": indicators["change"].value,
+        "rsi": indicators["rsi"].value,
+        "macd": macd.value,
+        "macd_signal": macd.signal_value,
+        "macd_hist": macd.hist,
+        "aroon_up": indicators["aroon"].up,
+        "aroon_down": indicators["aroon"].down,
+        "mom": indicators["mom"].value,
+        "roc": indicators["roc"].value,
+    }
+    for n in PARAMS["ma"]:
+        values[f"ma_{n}"] = indicators[f"ma_{n}"].value
+    return values
+
+
+def _own_bars(arrays):
+    # ชิดขวาแท่งจริงของแต่ละแถว (NaN จากวันที่ symbol นั้นไม่มีซื้อขายไปอยู่ต้นแถว) คอลัมน์สุดท้ายคือแท่งล่าสุดของตัวเอง
+    order = np.argsort(~np.isnan(arrays["Close"]), axis=1, kind="stable")
+    return {f: np.take_along_axis(a, order, axis=1) for f, a in arrays.items()}
+
+
+def _last_ts(indicators):
+    return next(iter(indicators.values())).last_ts
+
+
+def _naive(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+class Screener:
+    def __init__(self, folder=SNAPSHOT_DIR, period="2y"):
+        # period ต้องยาวพอให้ MA200 มีค่า
+        self.folder = folder
+        self.period = period
+        self.table = _frame([], [], [], {name: [] for name in COLUMNS})
+        self.states = {}
+        self.load()
+
+    # ---------- Build / Refresh ----------
+    def build(self, symbols):
+        """คำนวณ snapshot ใหม่ทั้งชุดแบบ vectorized (symbols x bars) ในรอบเดียว"""
+        panel = load_panel(symbols, period=self.period)
+        if panel.empty:
+            return self.table
+        symbols, _, arrays = engine.panel_arrays(panel, fill=False)
+        arrays = _own_bars(arrays)
+        close = arrays["Close"]
+        results = engine.compute(close, arrays["High"], arrays["Low"], indicators=ENGINE_INDICATORS, params=PARAMS)
+        values = {name: v[:, -1] for name, v in results.items()}
+        values["change_pct"] = engine.roc(close, 1)[:, -1]
+        last_dates = panel["Close"][symbols].apply(pd.Series.last_valid_index)
+        fresh = _frame(symbols, last_dates.to_numpy(), close[:, -1], values)
+
+        for symbol in symbols:
+            self.states.pop(symbol, None)  # state เก่าไม่ตรงกับ snapshot ใหม่ จะ seed ใหม่ตอน refresh
+        self._replace([fresh])
+        return self.table
+
+    def refresh(self, symbols=None):
+        """ดึงแท่งตั้งแต่วันล่าสุดใน snapshot (batch) แล้วอัปเดตทีละแท่ง O(1)
+
+        แท่งของวันล่าสุดถูก revise ทุกครั้ง (แท่งที่ยังไม่ปิดจะถูกแทนด้วยค่าใหม่)
+        ถ้าแท่งที่ดึงมาต่อกับ snapshot ไม่ได้ (ขาดช่วง) symbol นั้นจะถูก build ใหม่
+        """
+        symbols = list(self.table.index) if symbols is None else [s.upper() for s in symbols]
+        unknown = [s for s in symbols if s not in self.table.index]
+        known = [s for s in symbols if s in self.table.index]
+        updated = []
+        if known:
+            start = self.table.loc[known, "date"].min().to_pydatetime()
+            frames = load_many(known, period=None, start=start)
+            for symbol, df in frames.items():
+                dates = _naive(df.index)
+                last = self.table.at[symbol, "date"]
+                if not (dates == last).any():
+                    unknown.append(symbol)
+                    continue
+                rows = df[dates >= last]
+                stamps = pd.DatetimeIndex(rows.index).as_unit("ns").asi8
+                indicators = self.states.get(symbol)
+                for i, row in enumerate(rows.itertuples()):
+                    bar = (float(row.Close), float(row.High), float(row.Low))
+                    if i > 0:
+                        update_indicators(indicators, *bar, ts=stamps[i])
+                    elif indicators is not None and _last_ts(indicators) == stamps[0]:
+                        revise_indicators(indicators, *bar)
+                    else:
+                        indicators = self._seed(symbol, before=last)
+                        update_indicators(indicators, *bar, ts=stamps[0])
+                self.states[symbol] = indicators
+                updated.append(_frame([symbol], [_naive(rows.index)[-1]], [float(rows["Close"].iloc[-1])],
+                                      {k: [v] for k, v in _streaming_values(indicators).items()}))
+        self._replace(updated)
+        if unknown:
+            self.build(unknown)
+        return self.table
+
+    def _replace(self, frames):
+        frames = [f for f in frames if not f.empty]
+        if frames:
+            fresh = pd.concat(frames)
+            self.table = pd.concat([self.table.drop(index=fresh.index, errors="ignore"), fresh]).sort_index()
+
+    def _seed(self, symbol, before):
+        df = load_history(symbol, period=self.period)
+        df = df[_naive(df.index) < before]
+        return seed_indicators(BarSeries.from_frame(symbol, df), screener_indicators())
+
+    # ---------- Query ----------
+    def query(self, expr=None, sort_by=None, ascending=False, limit=None):
+        result = self.table if not expr else self.table.query(expr)
+        if sort_by:
+            result = result.sort_values(sort_by, ascending=ascending, na_position="last")
+        if limit:
+            result = result.head(limit)
+        return result
+
+    # ---------- Persistence ----------
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        self.table.to_pickle(os.path.join(self.folder, "snapshot.pkl"))
+        save_states(self.states, os.path.join(self.folder, "states.json"))
+
+    def load(self):
+        path = os.path.join(self.folder, "snapshot.pkl")
+        if os.path.exists(path):
+            self.table = pd.read_pickle(path)
+            self.states = load_states(os.path.join(self.folder, "states.json"))
+
+
+# ==================== Shared instance ====================
+_screener = None
+
+
+def get_screener():
+    # สร้างเมื่อใช้ครั้งแรก (โหลด snapshot จากดิสก์) ไม่ทำ I/O ตอน import
+    global _screener
+    if _screener is None:
+        _screener = Screener()
+    return _screener
@@ -1,34 +1,42 @@
-import yfinance as yf
+from Fetch.BarStore import load_history, load_with_warmup
+from Fetch.Fundamentals import get_statements
+from Fetch.IndicatorEngine import sma_bank
 import pandas as pd
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
+MA_WINDOWS = (5, 12, 26, 50, 200)
+
+
+# MA หลาย window จาก prefix sum เดียว: โหลดแท่งก่อนช่วงแสดงผลเท่าที่ window ใหญ่สุดต้องใช้ แล้วตัดกลับเหลือช่วงที่ขอ
+def moving_averages(ticker, start, end=None, windows=MA_WINDOWS, pct_change=False):
+    warmup = max(max(windows) - 1, 1 if pct_change else 0)
+    sdat, first = load_with_warmup(ticker, start, end, warmup=warmup)
+    if sdat is None or sdat.empty:
+        return sdat
+    sdat = sdat.copy()
+    bank = sma_bank(sdat["Close"].to_numpy(), windows)
+    for n in windows:
+        sdat[f"MA{n}"] = bank[n][0]
+    if pct_change:
+        sdat["% Change"] = sdat["Close"].pct_change() * 100
+    return sdat.iloc[first:]
+
 def fetch_stock_data(ticker):
     try:
         end_date = datetime.today()
         start_date = end_date - timedelta(days=30)
-        stock = yf.Ticker(ticker)
-        df = stock.history(start=start_date, end=end_date)
-        df["MA5"] = df["Close"].rolling(window=5).mean()
-        df["MA20"] = df["Close"].rolling(window=20).mean()
-        df["% Change"] = df["Close"].pct_change() * 100
-        return df
+        return moving_averages(ticker, start_date, end_date, windows=(5, 20), pct_change=True)
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
 #คำนวณindicators
-def calculate_MA(ticker):
+def calculate_MA(ticker, windows=MA_WINDOWS):
     try:
         end_date = datetime.today()
         start_date = end_date - relativedelta(months=6)
-        stock = yf.Ticker(ticker)
-        sdat  = stock.history(start = start_date , end = end_date)
-        sdat["MA5"] = sdat["Close"].rolling(window=5).mean()
-        sdat["MA12"] = sdat["Close"].rolling(window=12).mean()
-        sdat["MA26"] = sdat["Close"].rolling(window=26).mean()
-        sdat["MA50"] = sdat["Close"].rolling(window=50).mean()
-        sdat["MA200"] = sdat["Close"].rolling(window=200).mean()
-        return sdat[ ["MA5","MA12","MA26","MA50","MA200"] ]
+        sdat = moving_averages(ticker, start_date, end_date, windows=windows)
+        return sdat[[f"MA{n}" for n in windows]]
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
@@ -37,25 +45,14 @@ def fetch_rawdata(ticker):
     try:
         enddate = datetime.today()
         startdate = enddate-timedelta(days=30)
-        stock = yf.Ticker(ticker)
-        sdat = stock.history(start = startdate , end = enddate)
+        sdat = load_history(ticker, start = startdate , end = enddate)
         return sdat
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
 def financial_data(ticker):
     try:
-        stock = yf.Ticker(ticker)
-        # info = stock.info
-        financials = stock.financials
-        balance_sheet = stock.balance_sheet
-        cashflow = stock.cashflow
-        return {
-            # "info": info,
-            "financials": financials,
-            "balance_sheet": balance_sheet,
-            "cashflow": cashflow
-        }
+        return get_statements(ticker)
     except Exception as e:
         print(f"Error fetching financial data: {e}")
         return None
\ No newline at end of file
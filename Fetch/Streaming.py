@@ -0,0 +1,318 @@
+import json
+import math
+import os
+from collections import deque
+
+# ==================== Streaming Indicators ====================
+# indicator แบบมี state: seed จากประวัติครั้งเดียว แล้วอัปเดตแท่งใหม่ทีละแท่งด้วยงาน O(1)
+# ค่าเหมือน TA-Lib ทุกแท่ง และ to_state()/from_state() ทำให้ restart แล้วทำต่อได้โดยไม่ต้องคำนวณใหม่
+# push(..., ts) ข้ามแท่งที่รวมไปแล้วหลัง resume, revise() แทนที่แท่งล่าสุดที่ยังไม่ปิด
+NAN = float("nan")
+
+
+class StreamingIndicator:
+    kind = "base"
+    # last_ts: เวลา (epoch ns) ของแท่งล่าสุดที่รวมแล้ว, prev_state: state ก่อนแท่งล่าสุด (ใช้ revise)
+    last_ts = None
+    prev_state = None
+
+    def update(self, close, high=None, low=None):
+        raise NotImplementedError
+
+    def push(self, close, high=None, low=None, ts=None):
+        """อัปเดตแท่งที่มีเวลา ts; แท่งที่ ts <= last_ts รวมไปแล้วจะถูกข้าม (คืน None)"""
+        if ts is not None and self.last_ts is not None and ts <= self.last_ts:
+            return None
+        self.prev_state = self._snapshot()
+        value = self.update(close, high, low)
+        if ts is not None:
+            self.last_ts = int(ts)
+        return value
+
+    def revise(self, close, high=None, low=None):
+        """แทนที่แท่งล่าสุด (เช่นแท่งที่ยังไม่ปิด) ด้วยค่าใหม่ โดยย้อน state กลับไปก่อนแท่งนั้นแล้วอัปเดตซ้ำ"""
+        previous = self.prev_state
+        if previous is None:
+            raise ValueError("no pushed bar to revise")
+        last_ts = self.last_ts
+        self.__dict__.clear()
+        self.__dict__.update(StreamingIndicator.from_state(previous).__dict__)
+        self.prev_state = previous
+        self.last_ts = last_ts
+        return self.update(close, high, low)
+
+    def seed(self, close, high=None, low=None, ts=None):
+        value = NAN
+        n = len(close)
+        for i in range(n):
+            args = (float(close[i]),
+                    None if high is None else float(high[i]),
+                    None if low is None else float(low[i]))
+            # แท่งสุดท้ายผ่าน push เพื่อเก็บ last_ts และ state สำหรับ revise
+            value = self.push(*args, ts=None if ts is None else int(ts[i])) if i == n - 1 else self.update(*args)
+        return value
+
+    def to_state(self):
+        state = {"kind": self.kind}
+        for key, value in self.__dict__.items():
+            state[key] = _encode(value)
+        return state
+
+    def _snapshot(self):
+        state = self.to_state()
+        state.pop("prev_state", None)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        klass = _KINDS[state["kind"]]
+        obj = klass.__new__(klass)
+        for key, value in state.items():
+            if key != "kind":
+                setattr(obj, key, _decode(value))
+        return obj
+
+
+class StreamingSMA(StreamingIndicator):
+    kind = "sma"
+
+    def __init__(self, n):
+        self.n = n
+        self.window = deque(maxlen=n)
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, close, high=None, low=None):
+        if len(self.window) == self.n:
+            self.total -= self.window[0]
+        self.window.append(close)
+        self.total += close
+        self.value = self.total / self.n if len(self.window) == self.n else NAN
+        return self.value
+
+
+class StreamingEMA(StreamingIndicator):
+    kind = "ema"
+
+    def __init__(self, n, skip=0):
+        # skip: ข้าม n แท่งแรกก่อนเริ่มเก็บ seed (ใช้กับ fast EMA ใน MACD แบบ TA-Lib)
+        self.n = n
+        self.skip = skip
+        self.alpha = 2.0 / (n + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def update(self, close, high=None, low=None):
+        self.count += 1
+        if self.count <= self.skip:
+            return NAN
+        if self.count < self.skip + self.n:
+            self.seed_sum += close
+            return NAN
+        if self.count == self.skip + self.n:
+            self.value = (self.seed_sum + close) / self.n
+        else:
+            self.value += self.alpha * (close - self.value)
+        return self.value
+
+
+class StreamingRSI(StreamingIndicator):
+    kind = "rsi"
+
+    def __init__(self, n=14):
+        self.n = n
+        self.prev = NAN
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = NAN
+
+    def update(self, close, high=None, low=None):
+        prev, self.prev = self.prev, close
+        if math.isnan(prev):
+            return NAN
+        delta = close - prev
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.count += 1
+        if self.count < self.n:
+            self.avg_gain += gain
+            self.avg_loss += loss
+            return NAN
+        if self.count == self.n:
+            self.avg_gain = (self.avg_gain + gain) / self.n
+            self.avg_loss = (self.avg_loss + loss) / self.n
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.n
+            self.avg_loss += (loss - self.avg_loss) / self.n
+        total = self.avg_gain + self.avg_loss
+        self.value = 100.0 * self.avg_gain / total if total != 0 else 0.0
+        return self.value
+
+
+class StreamingMACD(StreamingIndicator):
+    kind = "macd"
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = StreamingEMA(fast, skip=slow - fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.value = NAN
+        self.signal_value = NAN
+        self.hist = NAN
+
+    def update(self, close, high=None, low=None):
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+        if math.isnan(fast) or math.isnan(slow):
+            return NAN
+        line = fast - slow
+        signal = self.signal.update(line)
+        if math.isnan(signal):
+            return NAN
+        self.value, self.signal_value, self.hist = line, signal, line - signal
+        return self.value
+
+
+class StreamingAroon(StreamingIndicator):
+    kind = "aroon"
+
+    def __init__(self, n=14):
+        # monotonic deque ของ (index, ค่า): หัวคิวคือค่าสุดขั้วล่าสุดใน window n+1 แท่ง -> amortized O(1)
+        self.n = n
+        self.index = -1
+        self.highs = deque()
+        self.lows = deque()
+        self.up = NAN
+        self.down = NAN
+
+    def update(self, close, high=None, low=None):
+        high = close if high is None else high
+        low = close if low is None else low
+        self.index += 1
+        i = self.index
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((i, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((i, low))
+        while self.highs[0][0] < i - self.n:
+            self.highs.popleft()
+        while self.lows[0][0] < i - self.n:
+            self.lows.popleft()
+        if i < self.n:
+            return NAN
+        self.up = 100.0 * (self.n - (i - self.highs[0][0])) / self.n
+        self.down = 100.0 * (self.n - (i - self.lows[0][0])) / self.n
+        return self.up
+
+
+class StreamingMOM(StreamingIndicator):
+    kind = "mom"
+
+    def __init__(self, n=10):
+        self.n = n
+        self.window = deque(maxlen=n + 1)
+        self.value = NAN
+
+    def update(self, close, high=None, low=None):
+        self.window.append(close)
+        self.value = close - self.window[0] if len(self.window) == self.n + 1 else NAN
+        return self.value
+
+
+class StreamingROC(StreamingMOM):
+    kind = "roc"
+
+    def update(self, close, high=None, low=None):
+        self.window.append(close)
+        if len(self.window) < self.n + 1:
+            self.value = NAN
+        else:
+            base = self.window[0]
+            self.value = (close / base - 1.0) * 100.0 if base != 0 else 0.0
+        return self.value
+
+
+_KINDS = {klass.kind: klass for klass in (
+    StreamingSMA, StreamingEMA, StreamingRSI, StreamingMACD, StreamingAroon, StreamingMOM, StreamingROC,
+)}
+
+
+# ==================== Serialization ====================
+def _encode(value):
+    if isinstance(value, StreamingIndicator):
+        return {"__indicator__": value.to_state()}
+    if isinstance(value, deque):
+        return {"__deque__": [list(v) if isinstance(v, tuple) else v for v in value], "maxlen": value.maxlen}
+    if isinstance(value, float) and math.isnan(value):
+        return {"__nan__": True}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "__indicator__" in value:
+            return StreamingIndicator.from_state(value["__indicator__"])
+        if "__deque__" in value:
+            return deque((tuple(v) if isinstance(v, list) else v for v in value["__deque__"]), maxlen=value["maxlen"])
+        if "__nan__" in value:
+            return NAN
+    return value
+
+
+def save_states(states, path):
+    """states: dict symbol -> dict ชื่อ -> StreamingIndicator"""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    payload = {symbol: {name: ind.to_state() for name, ind in indicators.items()}
+               for symbol, indicators in states.items()}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def load_states(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    return {symbol: {name: StreamingIndicator.from_state(state) for name, state in indicators.items()}
+            for symbol, indicators in payload.items()}
+
+
+# ==================== Per-symbol set ====================
+def default_indicators():
+    return {
+        "rsi": StreamingRSI(14),
+        "ema_12": StreamingEMA(12),
+        "ema_26": StreamingEMA(26),
+        "macd": StreamingMACD(12, 26, 9),
+        "aroon": StreamingAroon(14),
+        "mom": StreamingMOM(10),
+    }
+
+
+def seed_indicators(bars, indicators=None):
+    # bars: BarSeries (หรืออะไรก็ได้ที่มี close/high/low) -> dict indicator ที่อัปเดตถึงแท่งล่าสุดแล้ว
+    indicators = default_indicators() if indicators is None else indicators
+    ts = getattr(bars, "ts", None)
+    for ind in indicators.values():
+        ind.seed(bars.close, bars.high, bars.low, ts=ts)
+    return indicators
+
+
+def update_indicators(indicators, close, high=None, low=None, ts=None):
+    for ind in indicators.values():
+        ind.push(close, high, low, ts=ts)
+    return indicators
+
+
+def revise_indicators(indicators, close, high=None, low=None):
+    for ind in indicators.values():
+        ind.revise(close, high, low)
+    return indicators
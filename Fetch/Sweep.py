@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from Fetch import IndicatorEngine as engine
+from Fetch.BarStore import load_panel
+from Fetch.IndicatorEngine import panel_arrays
+from Fetch.Manage_FAV import loadfave
+
+# ==================== Crossover Parameter Sweep ====================
+# ทดสอบ fast/slow ทุกคู่ใน grid ทีเดียวบน matrix (symbols x bars)
+# คำนวณ MA/EMA แต่ละ period แค่ครั้งเดียว (SMA จาก prefix sum เดียวของ sma_bank) แล้วทุกคู่ใช้ bank ร่วมกัน
+# cross นับเฉพาะแท่งที่ทั้งสองเส้นมีค่าทั้งแท่งก่อนหน้าและแท่งปัจจุบัน (ไม่มี cross ปลอมตอน warm-up)
+FAST = (5, 8, 10, 12, 15, 20)
+SLOW = (20, 26, 30, 50, 100, 200)
+HORIZON = 10  # cross ถือว่า "hit" ถ้าราคาอีก HORIZON แท่งไปทางเดียวกับ cross
+
+STAT_COLUMNS = ["symbol", "kind", "fast", "slow", "crosses", "bullish", "bearish",
+                "hits", "hit_rate", "avg_return", "state", "last_cross"]
+CROSS_COLUMNS = ["symbol", "kind", "fast", "slow", "date", "cross", "close", "forward_return"]
+
+
+def pairs(fast=FAST, slow=SLOW):
+    return [(f, s) for f in fast for s in slow if f < s]
+
+
+def average_bank(close, periods, kind="ema"):
+    """dict period -> array (symbols x bars) ของ EMA หรือ SMA"""
+    periods = sorted(set(periods))
+    if kind == "sma":
+        return engine.sma_bank(close, periods)
+    if kind == "ema":
+        return {n: engine.ema(close, n) for n in periods}
+    raise ValueError(f"Unsupported kind: {kind}")
+
+
+def forward_returns(close, horizon=HORIZON):
+    close = engine._as_2d(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] > horizon:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:, :-horizon] = close[:, horizon:] / close[:, :-horizon] - 1.0
+    return out
+
+
+def sweep_arrays(symbols, dates, close, fast=FAST, slow=SLOW, kind="ema", horizon=HORIZON):
+    """close: array (symbols x bars) คืน (stats, crosses) เป็น DataFrame ต่อ (symbol, fast, slow)"""
+    close = engine._as_2d(close)
+    symbols = np.asarray(symbols, dtype=object)
+    dates = pd.DatetimeIndex(dates)
+    grid = pairs(fast, slow)
+    if not grid or close.shape[1] < 2:
+        return pd.DataFrame(columns=STAT_COLUMNS), pd.DataFrame(columns=CROSS_COLUMNS)
+
+    bank = average_bank(close, [n for pair in grid for n in pair], kind)
+    fwd = forward_returns(close, horizon)
+    S = close.shape[0]
+    stat_frames, cross_frames = [], []
+
+    for f, s in grid:
+        fast_line, slow_line = bank[f], bank[s]
+        valid = ~np.isnan(fast_line) & ~np.isnan(slow_line)
+        above = fast_line > slow_line
+        change = (above[:, 1:] != above[:, :-1]) & valid[:, 1:] & valid[:, :-1]
+        rows, cols = np.nonzero(change)
+        cols = cols + 1
+        direction = np.where(above[rows, cols], 1, -1).astype(np.int8)
+        ret = fwd[rows, cols] * direction  # > 0 แปลว่าราคาไปตามทิศของ cross
+        scored = ~np.isnan(ret)
+
+        crosses = np.bincount(rows, minlength=S)
+        bullish = np.bincount(rows, weights=direction == 1, minlength=S).astype(int)
+        evaluated = np.bincount(rows[scored], minlength=S)
+        hits = np.bincount(rows[scored], weights=ret[scored] > 0, minlength=S).astype(int)
+        ret_sum = np.bincount(rows[scored], weights=ret[scored], minlength=S)
+        last = np.full(S, -1)
+        np.maximum.at(last, rows, cols)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stat_frames.append(pd.DataFrame({
+                "symbol": symbols,
+                "kind": kind,
+                "fast": f,
+                "slow": s,
+                "crosses": crosses,
+                "bullish": bullish,
+                "bearish": crosses - bullish,
+                "hits": hits,
+                "hit_rate": np.where(evaluated > 0, hits / evaluated, np.nan),
+                "avg_return": np.where(evaluated > 0, ret_sum / evaluated, np.nan),
+                "state": np.where(valid[:, -1], np.where(above[:, -1], 1, -1), 0),
+                "last_cross": pd.Series(dates[np.maximum(last, 0)]).where(last >= 0),
+            }))
+        if len(rows):
+            cross_frames.append(pd.DataFrame({
+                "symbol": symbols[rows],
+                "kind": kind,
+                "fast": f,
+                "slow": s,
+                "date": dates[cols],
+                "cross": direction,
+                "close": close[rows, cols],
+                "forward_return": fwd[rows, cols],
+            }))
+
+    stats = pd.concat(stat_frames, ignore_index=True)
+    stats = stats.sort_values(["symbol", "hit_rate", "crosses"], ascending=[True, False, False], ignore_index=True)
+    crosses = (pd.concat(cross_frames, ignore_index=True) if cross_frames
+               else pd.DataFrame(columns=CROSS_COLUMNS))
+    return stats, crosses
+
+
+def sweep_panel(panel, fast=FAST, slow=SLOW, kind="ema", horizon=HORIZON):
+    symbols, dates, arrays = panel_arrays(panel)
+    return sweep_arrays(symbols, dates, arrays["Close"], fast=fast, slow=slow, kind=kind, horizon=horizon)
+
+
+def sweep(symbols, fast=FAST, slow=SLOW, kind="ema", period="5y", horizon=HORIZON):
+    """symbols: ชื่อเดียวหรือ list -> (stats, crosses)"""
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    panel = load_panel(symbols, period=period) if symbols else pd.DataFrame()
+    if panel.empty:
+        return pd.DataFrame(columns=STAT_COLUMNS), pd.DataFrame(columns=CROSS_COLUMNS)
+    return sweep_panel(panel, fast=fast, slow=slow, kind=kind, horizon=horizon)
+
+
+def sweep_watchlist(filepath, fast=FAST, slow=SLOW, kind="ema", period="5y", horizon=HORIZON):
+    return sweep(loadfave(filepath), fast=fast, slow=slow, kind=kind, period=period, horizon=horizon)
+
+
+def best_pairs(stats, min_crosses=3):
+    """คู่ fast/slow ที่ hit_rate ดีที่สุดของแต่ละ symbol (ต้องมี cross อย่างน้อย min_crosses ครั้ง)"""
+    ranked = stats[stats["crosses"] >= min_crosses]
+    ranked = ranked.sort_values(["hit_rate", "avg_return"], ascending=False)
+    return ranked.groupby("symbol", sort=True).head(1).reset_index(drop=True)
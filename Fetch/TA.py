@@ -0,0 +1,46 @@
+import os
+from Fetch import TA_Numpy
+
+# ==================== TA backend selection ====================
+# SOMESTOCK_TA_BACKEND=talib|numpy|auto (auto = ใช้ TA-Lib ถ้า import ได้ ไม่งั้นใช้ NumPy)
+_backend = None
+
+
+def _load(name):
+    if name == "numpy":
+        return TA_Numpy
+    import talib
+    return talib
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        name = os.environ.get("SOMESTOCK_TA_BACKEND", "auto").lower()
+        if name == "auto":
+            try:
+                _backend = _load("talib")
+            except ImportError:
+                _backend = TA_Numpy
+        else:
+            _backend = _load(name)
+    return _backend
+
+
+def set_backend(name):
+    global _backend
+    _backend = _load(name)
+    return _backend
+
+
+def backend_name():
+    return "numpy" if get_backend() is TA_Numpy else "talib"
+
+
+class _Proxy:
+    # ta.RSI(...) จะเรียก backend ที่เลือกอยู่ตอนนั้น
+    def __getattr__(self, name):
+        return getattr(get_backend(), name)
+
+
+ta = _Proxy()
@@ -0,0 +1,80 @@
+import sys
+import time
+import argparse
+import numpy as np
+from Fetch import TA_Numpy, IndicatorEngine
+from Fetch.Provider import LocalProvider
+
+# ==================== TA backend parity / benchmark ====================
+# python -m Fetch.TA_Benchmark --symbols 200 --years 20
+# เทียบ TA_Numpy กับ TA-Lib บนข้อมูลสังเคราะห์: ความต่างสูงสุด, pattern ที่ไม่ตรง และเวลาที่ใช้
+CASES = {
+    "SMA": (("close",), {"timeperiod": 30}),
+    "EMA": (("close",), {"timeperiod": 12}),
+    "RSI": (("close",), {"timeperiod": 14}),
+    "MACD": (("close",), {"fastperiod": 12, "slowperiod": 26, "signalperiod": 9}),
+    "AROON": (("high", "low"), {"timeperiod": 14}),
+    "MOM": (("close",), {"timeperiod": 10}),
+    "ROC": (("close",), {"timeperiod": 10}),
+    "WILLR": (("high", "low", "close"), {"timeperiod": 14}),
+    "CDLDOJI": (("open", "high", "low", "close"), {}),
+    "CDLHAMMER": (("open", "high", "low", "close"), {}),
+    "CDLSHOOTINGSTAR": (("open", "high", "low", "close"), {}),
+    "CDLENGULFING": (("open", "high", "low", "close"), {}),
+}
+
+
+def _outputs(result):
+    return result if isinstance(result, tuple) else (result,)
+
+
+def run(symbols=200, years=20, tolerance=1e-8):
+    import talib
+
+    names = [f"S{i}" for i in range(symbols)]
+    provider = LocalProvider()
+    _, panel = provider.synthetic_panel(names, years=years)
+    fields = {"open": panel["Open"], "high": panel["High"], "low": panel["Low"], "close": panel["Close"]}
+    print(f"📊 {symbols} symbols x {panel['Close'].shape[1]} bars")
+    ok = provider.check_replay(names[:5])
+    print("✅ synthetic replay stable across end dates" if ok else "❌ synthetic bars depend on end date")
+    print(f"{'function':<16}{'max |diff|':>14}{'mismatch':>10}{'talib s':>10}{'numpy s':>10}{'ratio':>8}")
+
+    for name, (inputs, params) in CASES.items():
+        times = {}
+        results = {}
+        for label, backend in (("talib", talib), ("numpy", TA_Numpy)):
+            fn = getattr(backend, name)
+            started = time.perf_counter()
+            results[label] = [_outputs(fn(*(fields[f][r] for f in inputs), **params)) for r in range(symbols)]
+            times[label] = time.perf_counter() - started
+
+        max_diff, mismatch = 0.0, 0
+        for a_row, b_row in zip(results["talib"], results["numpy"]):
+            for a, b in zip(a_row, b_row):
+                a = np.asarray(a, dtype=np.float64)
+                b = np.asarray(b, dtype=np.float64)
+                both = ~np.isnan(a) & ~np.isnan(b)
+                mismatch += int((np.isnan(a) != np.isnan(b)).sum())
+                if both.any():
+                    diff = np.abs(a[both] - b[both])
+                    max_diff = max(max_diff, float(diff.max()))
+                    mismatch += int((diff > tolerance * np.maximum(1.0, np.abs(a[both]))).sum())
+        ok &= mismatch == 0
+        ratio = times["numpy"] / times["talib"] if times["talib"] else float("nan")
+        print(f"{name:<16}{max_diff:>14.3e}{mismatch:>10}{times['talib']:>10.3f}{times['numpy']:>10.3f}{ratio:>8.2f}")
+
+    # batch path: ทุก indicator ทุก symbol ใน compute เดียว
+    started = time.perf_counter()
+    IndicatorEngine.compute(panel["Close"], panel["High"], panel["Low"])
+    print(f"⚡ IndicatorEngine.compute (all indicators, all symbols): {time.perf_counter() - started:.3f}s")
+    print("✅ parity OK" if ok else "❌ parity mismatch")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the NumPy TA backend against TA-Lib")
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--years", type=float, default=20)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.symbols, args.years) else 1)
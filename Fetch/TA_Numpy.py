@@ -0,0 +1,112 @@
+import numpy as np
+from Fetch import IndicatorEngine as engine
+
+# ==================== NumPy TA backend ====================
+# ฟังก์ชันชื่อ/signature เดียวกับ talib สำหรับเครื่องที่ติดตั้ง TA-Lib ไม่ได้ (เช่น Linux worker)
+# indicator ใช้ kernel เดียวกับ IndicatorEngine, candle pattern ใช้ค่า CandleSettings default ของ TA-Lib
+# ค่าที่ได้ตรงกับ TA-Lib (ดู Fetch/TA_Benchmark.py)
+def _row(x):
+    return x[0]
+
+
+def SMA(real, timeperiod=30):
+    return _row(engine.sma(real, timeperiod))
+
+
+def EMA(real, timeperiod=30):
+    return _row(engine.ema(real, timeperiod))
+
+
+def RSI(real, timeperiod=14):
+    return _row(engine.rsi(real, timeperiod))
+
+
+def MACD(real, fastperiod=12, slowperiod=26, signalperiod=9):
+    return tuple(_row(x) for x in engine.macd(real, fastperiod, slowperiod, signalperiod))
+
+
+def AROON(high, low, timeperiod=14):
+    down, up = engine.aroon(high, low, timeperiod)
+    return _row(down), _row(up)
+
+
+def MOM(real, timeperiod=10):
+    return _row(engine.mom(real, timeperiod))
+
+
+def ROC(real, timeperiod=10):
+    return _row(engine.roc(real, timeperiod))
+
+
+def WILLR(high, low, close, timeperiod=14):
+    return _row(engine.willr(high, low, close, timeperiod))
+
+
+# ==================== Candle patterns ====================
+def _candles(open, high, low, close):
+    o, h, l, c = (np.asarray(x, dtype=np.float64) for x in (open, high, low, close))
+    body = np.abs(c - o)
+    hl = h - l
+    upper = h - np.maximum(o, c)
+    lower = np.minimum(o, c) - l
+    return o, h, l, c, body, hl, upper, lower
+
+
+def _trailing_mean(x, n):
+    # ค่าเฉลี่ยของ n แท่ง "ก่อนหน้า" แท่ง i (ไม่รวม i) แบบ CandleAverage ของ TA-Lib
+    out = np.full(len(x), np.nan)
+    if len(x) > n:
+        csum = np.concatenate(([0.0], np.cumsum(x)))
+        out[n:] = (csum[n:-1] - csum[:-n - 1]) / n
+    return out
+
+
+def _pattern(mask, lookback, value=100):
+    out = np.zeros(len(mask), dtype=np.int32)
+    hit = np.asarray(mask)[lookback:]
+    out[lookback:] = np.where(hit, value, 0)
+    return out
+
+
+def CDLDOJI(open, high, low, close):
+    o, h, l, c, body, hl, upper, lower = _candles(open, high, low, close)
+    with np.errstate(invalid="ignore"):
+        mask = body <= 0.1 * _trailing_mean(hl, 10)
+    return _pattern(mask, 10)
+
+
+def CDLHAMMER(open, high, low, close):
+    o, h, l, c, body, hl, upper, lower = _candles(open, high, low, close)
+    near = np.full(len(o), np.nan)
+    near[1:] = 0.2 * _trailing_mean(hl, 5)[:-1]  # Near เฉลี่ยของแท่ง i-1
+    prev_low = np.concatenate(([np.nan], l[:-1]))
+    with np.errstate(invalid="ignore"):
+        mask = ((body < _trailing_mean(body, 10))
+                & (lower > body)
+                & (upper < 0.1 * _trailing_mean(hl, 10))
+                & (np.minimum(o, c) <= prev_low + near))
+    return _pattern(mask, 11)
+
+
+def CDLSHOOTINGSTAR(open, high, low, close):
+    o, h, l, c, body, hl, upper, lower = _candles(open, high, low, close)
+    prev_top = np.concatenate(([np.nan], np.maximum(o, c)[:-1]))
+    with np.errstate(invalid="ignore"):
+        mask = ((body < _trailing_mean(body, 10))
+                & (upper > body)
+                & (lower < 0.1 * _trailing_mean(hl, 10))
+                & (np.minimum(o, c) > prev_top))
+    return _pattern(mask, 11, value=-100)
+
+
+def CDLENGULFING(open, high, low, close):
+    o, h, l, c, *_ = _candles(open, high, low, close)
+    color = np.where(c >= o, 1, -1)
+    o1, c1 = np.roll(o, 1), np.roll(c, 1)
+    color1 = np.roll(color, 1)
+    white = (color == 1) & (color1 == -1) & (((c >= o1) & (o < c1)) | ((c > o1) & (o <= c1)))
+    black = (color == -1) & (color1 == 1) & (((o >= c1) & (c < o1)) | ((o > c1) & (c <= o1)))
+    strength = np.where((o != c1) & (c != o1), 100, 80)
+    out = np.where(white | black, color * strength, 0).astype(np.int32)
+    out[:2] = 0
+    return out
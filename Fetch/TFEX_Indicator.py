@@ -1,25 +1,33 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import yfinance as yf
+from Fetch.BarStore import load_history
+from Fetch.BarSeries import BarSeries
 import numpy as np
 
 # ==================== Fetch Data ====================
 # data = yf.download("AAPL", start="2020-01-01", end="2023-01-01")
+def fetch_series(symbol, period="1y"):
+    return BarSeries.from_frame(symbol.upper(), load_history(symbol, period=period))
 def fetch_data(symbol, period="1y"):
-    data.reset_index(inplace=True)
-    data = yf.Ticker(symbol).history(period=period)
-    data.reset_index(inplace=True)
-    return data
+    return fetch_series(symbol, period).to_frame(reset_index=True)
 def MA(symbol, period="1y"):
-    data = fetch_data(symbol, period)
+    bars = fetch_series(symbol, period)
+    close = pd.Series(bars.close)
         # สร้าง Moving Average
-    data['MA20'] = data['Close'].rolling(window=20).mean()
-    data['MA50'] = data['Close'].rolling(window=50).mean()
+    ma20 = close.rolling(window=20).mean().to_numpy()
+    ma50 = close.rolling(window=50).mean().to_numpy()
 
     # สร้างสัญญาณ Buy/Sell
-    data['Signal'] = 0
-    data['Signal'][20:] = np.where(data['MA20'][20:] > data['MA50'][20:], 1, 0)
-    data['Position'] = data['Signal'].diff()
+    signal = np.zeros(len(bars), dtype=np.int8)
+    signal[20:] = ma20[20:] > ma50[20:]
+    position = np.diff(signal.astype(float), prepend=np.nan)
+
+    # DataFrame สำหรับแสดงผล/คืนค่า
+    data = bars.to_frame(reset_index=True)
+    data['MA20'] = ma20
+    data['MA50'] = ma50
+    data['Signal'] = signal
+    data['Position'] = position
 
     # แสดงกราฟ
     plt.figure(figsize=(14, 7))
@@ -42,14 +50,16 @@ def MA(symbol, period="1y"):
 
     return data
 def predict_rsi(symbol, period="1y"):
-    data = fetch_data(symbol, period)
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    bars = fetch_series(symbol, period)
+    delta = np.diff(bars.close, prepend=np.nan)
+    gain = pd.Series(np.where(delta > 0, delta, 0.0)).rolling(window=14).mean().to_numpy()
+    loss = pd.Series(np.where(delta < 0, -delta, 0.0)).rolling(window=14).mean().to_numpy()
 
-    rs = gain / loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
     rsi = 100 - (100 / (1 + rs))
 
+    data = bars.to_frame(reset_index=True)
     data['RSI'] = rsi
 
     plt.figure(figsize=(14, 7))
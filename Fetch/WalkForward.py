@@ -0,0 +1,218 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import torch
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.linear_model import LinearRegression
+from Fetch.BarStore import load_many
+from Fetch.Manage_FAV import loadfave
+from Fetch.Optimizer import walk_forward_splits
+from Fetch.Prediction import StockPriceModel, StockDataset, fit_model
+
+# ==================== Walk-forward Model Evaluation ====================
+# rolling-origin ต่อ symbol: train บนช่วง train แล้วพยากรณ์ราคาปิดวันถัดไปทีละแท่งในช่วง test ที่ตามมา
+# 1 task = (symbol, fold) สร้าง fold dataset ครั้งเดียวแล้วรันทุกโมเดลบนมัน (scale ด้วย min/max ของช่วง train เท่านั้น ไม่ leak)
+# task กระจายไป process pool; แต่ละ worker จำกัด thread ของ torch ไม่ให้แย่ง CPU กันเอง
+# metrics เป็นหน่วยราคาจริง พร้อมเวลา fit/predict ต่อ fold
+MODELS = ("naive_last", "naive_mean", "linear_trend", "mlp")
+
+
+# ==================== Fold Dataset ====================
+class FoldData:
+    """window ของ train/test ใน scale ของช่วง train (X: windows, y: ราคาวันถัดไป)"""
+    def __init__(self, close, train, test, window_size):
+        close = np.asarray(close, dtype=np.float64)
+        low, high = close[train].min(), close[train].max()
+        self.low, self.scale = low, (high - low) or 1.0
+        scaled = ((close - low) / self.scale).astype(np.float32)
+
+        self.window_size = window_size
+        self.train_index = np.arange(train.start, train.stop)  # index ของแท่งใน close
+        self.test_index = np.arange(test.start, test.stop)
+        self.train = StockDataset(scaled[train], window_size)
+        # window ของ test ใช้ window_size แท่งก่อนหน้า (ซึ่งอยู่ใน train) เป็น input
+        windows = sliding_window_view(scaled, window_size)
+        self.test_X = windows[test.start - window_size:test.stop - window_size]
+        self.test_y = close[test]
+        self.train_y = close[train]
+
+    def unscale(self, values):
+        return np.asarray(values, dtype=np.float64).ravel() * self.scale + self.low
+
+
+# ==================== Models ====================
+# ทุกตัวรับ (fold, seed, **options) คืนราคาพยากรณ์ของทุกแท่งใน test
+def naive_last(fold, seed=0, **options):
+    # ราคาพรุ่งนี้ = ราคาวันนี้
+    return fold.unscale(fold.test_X[:, -1])
+
+
+def naive_mean(fold, seed=0, **options):
+    return fold.unscale(fold.test_X.mean(axis=1))
+
+
+def linear_trend(fold, seed=0, **options):
+    # แบบเดียวกับ Prediction.liner_regression: ราคาเทียบ index ของวัน แล้วลากเส้นต่อไปในช่วง test
+    model = LinearRegression()
+    model.fit(fold.train_index.reshape(-1, 1), fold.train_y)
+    return model.predict(fold.test_index.reshape(-1, 1))
+
+
+def mlp(fold, seed=0, epochs=100, batch_size=16, **options):
+    torch.manual_seed(seed)
+    model = StockPriceModel(fold.window_size)
+    fit_model(model, fold.train, epochs=epochs, batch_size=batch_size, seed=seed)
+    model.eval()
+    with torch.no_grad():
+        preds = model(torch.from_numpy(np.ascontiguousarray(fold.test_X))).numpy()
+    return fold.unscale(preds)
+
+
+MODEL_FUNCTIONS = {
+    "naive_last": naive_last,
+    "naive_mean": naive_mean,
+    "linear_trend": linear_trend,
+    "mlp": mlp,
+}
+
+
+def _metrics(actual, predicted, previous):
+    error = predicted - actual
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mape = np.nanmean(np.abs(error / actual)) * 100
+        # ทิศทาง: พยากรณ์ขึ้น/ลงจากราคาวันก่อนตรงกับที่เกิดจริงไหม (ไม่นับแท่งที่พยากรณ์ว่าไม่เปลี่ยน เช่น naive_last)
+        moved = predicted != previous
+        hit_rate = np.mean(np.sign(predicted - previous)[moved] == np.sign(actual - previous)[moved]) if moved.any() else np.nan
+    return {"rmse": float(np.sqrt(np.mean(error ** 2))), "mae": float(np.mean(np.abs(error))),
+            "mape": float(mape), "hit_rate": float(hit_rate)}
+
+
+# ==================== Worker side ====================
+_worker = {}
+
+
+def _init_worker(closes, threads):
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(threads)
+    except RuntimeError:  # ตั้งได้ครั้งเดียวต่อ process
+        pass
+    _worker["closes"] = closes
+
+
+def evaluate_fold(symbol, k, train, test, models, window_size, seed, options):
+    fold = FoldData(_worker["closes"][symbol], train, test, window_size)
+    previous = fold.test_X[:, -1] * fold.scale + fold.low
+    rows = []
+    for name in models:
+        started = time.perf_counter()
+        predicted = MODEL_FUNCTIONS[name](fold, seed=seed + k, **options)
+        elapsed = time.perf_counter() - started
+        rows.append({"symbol": symbol, "fold": k, "model": name,
+                     "train_bars": train.stop - train.start, "test_bars": test.stop - test.start,
+                     **_metrics(fold.test_y, predicted, previous), "seconds": elapsed})
+    return rows
+
+
+# ==================== Driver ====================
+def _report(done, total, started):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else float("nan")
+    print(f"⏳ {done}/{total} folds ({done / total:.0%}) {rate:.1f} folds/s, ETA {eta:.0f}s")
+
+
+def evaluate_arrays(closes, models=MODELS, folds=4, window_size=10, train_bars=None, test_bars=None,
+                    workers=None, threads=None, seed=0, progress=_report, **options):
+    """closes: dict symbol -> array ราคาปิด คืน (results, report)
+    options ส่งต่อให้โมเดล (เช่น epochs, batch_size ของ mlp)"""
+    closes = {s: np.asarray(c, dtype=np.float64) for s, c in closes.items()}
+    closes = {s: c[~np.isnan(c)] for s, c in closes.items()}
+    tasks = []
+    for symbol, close in closes.items():
+        try:
+            splits = walk_forward_splits(len(close), folds, train_bars, test_bars)
+        except ValueError:
+            print(f"⚠️ {symbol}: not enough bars for {folds} folds")
+            continue
+        for k, (train, test) in enumerate(splits):
+            if train.stop - train.start > window_size + 1:
+                tasks.append((symbol, k, train, test))
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    started = time.perf_counter()
+    rows = []
+
+    if workers == 1:
+        previous_threads = torch.get_num_threads()
+        _init_worker(closes, threads)
+        try:
+            for done, task in enumerate(tasks, 1):
+                rows.extend(evaluate_fold(*task, models, window_size, seed, options))
+                if progress:
+                    progress(done, len(tasks), started)
+        finally:
+            torch.set_num_threads(previous_threads)
+            _worker.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(closes, threads)) as pool:
+            futures = [pool.submit(evaluate_fold, *task, models, window_size, seed, options) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                rows.extend(future.result())
+                if progress:
+                    progress(done, len(tasks), started)
+
+    elapsed = time.perf_counter() - started
+    results = pd.DataFrame(rows)
+    if len(results):
+        results = results.sort_values(["symbol", "fold", "model"]).reset_index(drop=True)
+    report = {
+        "symbols": len(closes),
+        "folds": folds,
+        "tasks": len(tasks),
+        "models": list(models),
+        "workers": workers,
+        "threads": threads,
+        "seconds": elapsed,
+        "folds_per_sec": len(tasks) / elapsed if elapsed > 0 else float("nan"),
+    }
+    return results, report
+
+
+def summary(results):
+    """ค่าเฉลี่ยของทุก symbol/fold ต่อโมเดล เรียงตาม RMSE เทียบ naive_last (ต่ำกว่า 1 = ดีกว่าราคาเมื่อวาน)"""
+    if results.empty:
+        return pd.DataFrame()
+    table = results.groupby("model")[["rmse", "mae", "mape", "hit_rate", "seconds"]].mean()
+    if "naive_last" in table.index:
+        base = results[results["model"] == "naive_last"].set_index(["symbol", "fold"])["rmse"]
+        ratio = results.set_index(["symbol", "fold"]).assign(base=base)
+        table["rmse_vs_naive"] = (ratio["rmse"] / ratio["base"]).groupby(ratio["model"]).mean()
+    return table.sort_values("rmse")
+
+
+def best_models(results, metric="rmse"):
+    """โมเดลที่ค่าเฉลี่ยข้าม fold ดีที่สุดของแต่ละ symbol"""
+    if results.empty:
+        return pd.DataFrame()
+    table = results.groupby(["symbol", "model"])[metric].mean().unstack("model")
+    best = table.idxmax(axis=1) if metric == "hit_rate" else table.idxmin(axis=1)
+    return table.assign(best=best)
+
+
+def evaluate(symbols, models=MODELS, period="2y", folds=4, window_size=10, workers=None, threads=None,
+             seed=0, progress=_report, **options):
+    symbols = [symbols.upper()] if isinstance(symbols, str) else [s.upper() for s in symbols]
+    frames = load_many(symbols, period=period)
+    closes = {s: frames[s]["Close"].to_numpy() for s in symbols if s in frames}
+    return evaluate_arrays(closes, models=models, folds=folds, window_size=window_size, workers=workers,
+                           threads=threads, seed=seed, progress=progress, **options)
+
+
+def evaluate_watchlist(filepath, models=MODELS, period="2y", folds=4, workers=None, **options):
+    return evaluate(loadfave(filepath), models=models, period=period, folds=folds, workers=workers, **options)
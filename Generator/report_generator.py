@@ -1,6 +1,6 @@
 import fpdf
 import os
-import yfinance as yf
+from Fetch.BarStore import load_history
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 def exportpdf(text , filename = "StockReport"):
@@ -17,7 +17,7 @@ def exportpdf(text , filename = "StockReport"):
     return True
 
 def exportgraph(Name ,period  = '1y',show_ma = True, ma_window = 20):
-    df = yf.download(Name,period=period)
+    df = load_history(Name, period=period)
 
     plt.figure(figsize=(14,7))
     plt.plot(df.index, df['Close'], label='Close Price', color='blue')
@@ -1,9 +1,12 @@
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QWidget,
-    QVBoxLayout, QGridLayout, QLabel, QSpacerItem, QSizePolicy
+    QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QSpacerItem, QSizePolicy,
+    QLineEdit, QTextEdit, QComboBox, QSpinBox, QFileDialog
 )
 from PySide6.QtGui import QCursor
 from PySide6.QtCore import Qt
+from Fetch import Forecast
+from Fetch.Manage_FAV import loadfave
 
 
 class DashboardWindow(QMainWindow):
@@ -26,11 +29,62 @@ class DashboardWindow(QMainWindow):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
 
-       
+        # --- Watchlist Forecast ---
+        self.symbols_input = QLineEdit()
+        self.symbols_input.setPlaceholderText("Symbols (e.g., AAPL,MSFT) หรือเลือกไฟล์รายการโปรด")
+        layout.addWidget(self.symbols_input)
+
+        self.load_button = QPushButton("📂 เลือกไฟล์รายการโปรด")
+        self.load_button.clicked.connect(self.load_watchlist)
+        layout.addWidget(self.load_button)
+
+        options_layout = QHBoxLayout()
+        self.horizon_spin = QSpinBox()
+        self.horizon_spin.setRange(1, Forecast.HORIZON)
+        self.horizon_spin.setValue(Forecast.HORIZON)
+        self.horizon_spin.setSuffix(" วัน")
+        options_layout.addWidget(self.horizon_spin)
+        self.method_combo = QComboBox()
+        self.method_combo.addItems(list(Forecast.METHODS))
+        options_layout.addWidget(self.method_combo)
+        layout.addLayout(options_layout)
+
+        self.forecast_button = QPushButton("📈 Forecast")
+        self.forecast_button.clicked.connect(self.forecast_watchlist)
+        layout.addWidget(self.forecast_button)
+
+        self.result_text = QTextEdit()
+        self.result_text.setReadOnly(True)
+        layout.addWidget(self.result_text)
+
 
         # Add stretch to push the label to the bottom
 
         # Windows instances
         self.second_window = None
         self.prediction_window = None
-        self.Manage_window = None
\ No newline at end of file
+        self.Manage_window = None
+
+    def load_watchlist(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "เลือกไฟล์รายการโปรด", "", "JSON Files (*.json);;All Files (*)"
+        )
+        if file_path:
+            self.symbols_input.setText(",".join(loadfave(file_path)))
+
+    def forecast_watchlist(self):
+        symbols = [s.strip().upper() for s in self.symbols_input.text().split(",") if s.strip()]
+        if not symbols:
+            self.result_text.setPlainText("⚠️ กรุณาใส่ symbol หรือเลือกไฟล์รายการโปรด")
+            return
+        horizon = self.horizon_spin.value()
+        try:
+            result = Forecast.forecast(symbols, horizon=horizon, method=self.method_combo.currentText())
+        except Exception as e:
+            self.result_text.setPlainText(f"❌ Error: {e}")
+            return
+        if result is None:
+            self.result_text.setPlainText("⚠️ ไม่มีข้อมูลราคาเพียงพอ")
+            return
+        self.result_text.setPlainText(f"📈 Forecast {horizon} วัน\n{result.table(horizon).round(2).to_string()}")
+        result.plot()
@@ -4,7 +4,7 @@ from PySide6.QtWidgets import (
     QListWidgetItem, QFileDialog, QCheckBox
 )
 from PySide6.QtCore import Qt
-from Fetch import Prediction
+from Fetch import Prediction, PatternScanner, IndicatorEngine, Screener
 from Fetch.Manage_FAV import loadfave
 import threading
 from concurrent.futures import ThreadPoolExecutor
@@ -12,6 +12,17 @@ import os
 import pandas as pd
 import json
 
+# ตัวเลือกที่สแกนได้ด้วย PatternScanner
+SCAN_PATTERNS = {
+    "Hammer search": "hammer",
+    "Doji search": "doji",
+}
+
+# ตัวเลือกที่คำนวณทั้ง watchlist ได้ในครั้งเดียว (คืนตาราง/Series ต่อ symbol)
+BATCH_PREDICTIONS = {
+    "Binomial Prediction": Prediction.predict_prices_binomial,
+    "PricePrediction (Global)": Prediction.predict_next_prices,
+}
 
 class PredictionWindow(QMainWindow):
     def __init__(self):
@@ -45,7 +56,7 @@ class PredictionWindow(QMainWindow):
 
         self.combo = QComboBox()
         self.combo.addItems([
-            "RSI", "PricePrediction","Linear Regression Price", "Binomial Prediction", "Hammer search", "Doji search",
+            "RSI", "PricePrediction", "PricePrediction (Global)", "Linear Regression Price", "Binomial Prediction", "Hammer search", "Doji search",
             "EMA Cross", "PEG Ratio", "MACD", "Trending", "Aroon", "Sushi", "VMA", "ROC", "WILLR"
         ])
         self.combo.setPlaceholderText("Select an option")
@@ -58,6 +69,25 @@ class PredictionWindow(QMainWindow):
         self.predict_button.clicked.connect(self.predict_stock)
         left_layout.addWidget(self.predict_button)
 
+        self.scan_json_button = QPushButton("📂 สแกนทุกตัวจากไฟล์ JSON")
+        self.scan_json_button.clicked.connect(self.load_json_and_predict)
+        left_layout.addWidget(self.scan_json_button)
+
+        # --- Screener ---
+        screener_layout = QHBoxLayout()
+        self.screener_input = QLineEdit()
+        self.screener_input.setPlaceholderText("Screener เช่น rsi < 30 and close > ma_200")
+        screener_layout.addWidget(self.screener_input)
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItems(Screener.COLUMNS[1:])
+        self.sort_combo.setCurrentText("roc")
+        screener_layout.addWidget(self.sort_combo)
+        left_layout.addLayout(screener_layout)
+
+        self.screener_button = QPushButton("🔎 กรอง/เรียงหุ้น (Screener)")
+        self.screener_button.clicked.connect(self.screen_stocks)
+        left_layout.addWidget(self.screener_button)
+
         back_to_main_btn = QPushButton("⬅ กลับไปหน้าหลัก")
         back_to_main_btn.clicked.connect(self.open_Main_window)
         left_layout.addWidget(back_to_main_btn)
@@ -135,37 +165,37 @@ class PredictionWindow(QMainWindow):
             return
 
         try:
-            with open(file_path, "r") as f:
+            with open(file_path, "r", encoding="utf-8") as f:
                 raw_data = json.load(f)
-            df = pd.DataFrame(raw_data)
-
-            if "Date" in df.columns:
-                df["Date"] = pd.to_datetime(df["Date"])
-                df.set_index("Date", inplace=True)
 
             option = self.combo.currentText()
             self.result_text.clear()
+
+            # ไฟล์รายการโปรด (list ของ symbol) -> สแกนทุกตัวในไฟล์ทีเดียว
+            if isinstance(raw_data, list) and raw_data and all(isinstance(x, str) for x in raw_data):
+                symbols = [s.strip().upper() for s in raw_data if s.strip()]
+                self.scan_symbols(symbols, option)
+                return
+
+            df = pd.DataFrame(raw_data)
+            date_column = next((c for c in ("Date", "Datetime", "date", "datetime") if c in df.columns), None)
+            if date_column is None:
+                raise ValueError("JSON rows need a Date field (e.g. \"Date\": \"2024-01-31\")")
+            df[date_column] = pd.to_datetime(df[date_column])
+            df.set_index(date_column, inplace=True)
             symbol = os.path.basename(file_path).split(".")[0].upper()
-            show_graph = self.graph_checkbox.isChecked()
-
-            match option:
-                case "RSI":
-                    result = Prediction.predict_rsi_from_df(df, plot=show_graph)
-                case "MACD":
-                    result = Prediction.predict_macd_from_df(df, plot=show_graph)
-                case "Trending":
-                    result = Prediction.predict_momentum_df(df, plot=show_graph)
-                    
-                case "Aroon":
-                    result = Prediction.predict_aroon_from_df(df, plot=show_graph)
-                case "Hammer search":
-                    result = Prediction.detect_hammer_from_df(df, plot=show_graph)
-                case "Doji search":
-                    result = Prediction.detect_doji_from_df(df, plot=show_graph)
-                case "Sushi":
-                    result = Prediction.sushiroll_from_df(df, plot=show_graph)
-                case _:
-                    result = "❌ ฟังก์ชันนี้ยังไม่รองรับการเรียกจาก JSON"
+
+            pattern = SCAN_PATTERNS.get(option)
+            indicators = Prediction.ENGINE_OPTIONS.get(option)
+            if pattern:
+                hits = PatternScanner.scan_arrays([symbol], df.index, df["Open"], df["High"], df["Low"], df["Close"],
+                                                  patterns=(pattern,))
+                result = [str(d.date()) for d in hits["date"]]
+            elif indicators:
+                values = IndicatorEngine.compute(df["Close"], df.get("High"), df.get("Low"), indicators=indicators)
+                result = "\n".join(f"{name}: {v[0, -1]:.2f}" for name, v in values.items())
+            else:
+                result = "❌ ฟังก์ชันนี้ยังไม่รองรับการเรียกจาก JSON"
 
             self.result_text.append(f"📊 JSON Prediction for {symbol}:\n{result}\n")
             self.result_text.append(f"🧠 Method used: {option}\n{'-'*50}")
@@ -173,6 +203,39 @@ class PredictionWindow(QMainWindow):
         except Exception as e:
             self.result_text.setText(f"❌ Error loading JSON: {e}")
 
+    def scan_symbols(self, symbols, option):
+        pattern = SCAN_PATTERNS.get(option)
+        indicators = Prediction.ENGINE_OPTIONS.get(option)
+        if pattern:
+            hits = PatternScanner.scan_watchlist(symbols, patterns=(pattern,))
+            for symbol in symbols:
+                dates = [str(d.date()) for d in hits.loc[hits["symbol"] == symbol, "date"]]
+                self.result_text.append(f"🕯️ {symbol} - {option}: {dates}\n{'-'*50}\n")
+        elif indicators:
+            self.show_batch_result(symbols, option, indicators)
+        else:
+            self.result_text.setText("❌ ฟังก์ชันนี้ยังไม่รองรับการสแกนทั้งไฟล์")
+
+    def screen_stocks(self):
+        symbols = [s.strip().upper() for s in self.label_input.text().split(",") if s.strip()]
+        if not symbols and self.favorite_file:
+            symbols = loadfave(self.favorite_file)
+        self.result_text.clear()
+        try:
+            screener = Screener.get_screener()
+            screener.refresh(symbols or None)
+            screener.save()
+            table = screener.query(self.screener_input.text().strip() or None, sort_by=self.sort_combo.currentText())
+            if symbols:
+                table = table[table.index.isin([s.upper() for s in symbols])]
+            if table.empty:
+                self.result_text.setText("⚠ ไม่มีหุ้นที่ตรงเงื่อนไข")
+                return
+            columns = ["close", "change_pct", "rsi", "macd_hist", "aroon_osc", "roc", "dist_ma_50", "dist_ma_200"]
+            self.result_text.setText(f"🔎 {len(table)} symbols\n\n{table[columns].round(2).to_string()}")
+        except Exception as e:
+            self.result_text.setText(f"❌ Screener error: {e}")
+
     def predict_stock(self):
         symbols = [s.strip().upper() for s in self.label_input.text().split(",") if s.strip()]
         if not symbols:
@@ -183,6 +246,33 @@ class PredictionWindow(QMainWindow):
         self.result_text.clear()
         show_graph = self.graph_checkbox.isChecked()
 
+        engine_indicators = Prediction.ENGINE_OPTIONS.get(option)
+        if engine_indicators and len(symbols) > 1 and not show_graph:
+            try:
+                self.show_batch_result(symbols, option, engine_indicators)
+                return
+            except Exception as e:
+                self.result_text.append(f"⚠ Batch indicator failed, falling back to per-symbol run: {e}\n")
+
+        batch = BATCH_PREDICTIONS.get(option)
+        if batch and len(symbols) > 1 and not show_graph:
+            try:
+                table = batch(symbols)
+                self.result_text.append(f"📈 {option}:\n\n{table.round(2).to_string()}")
+                self.result_text.append(f"\n🛠 Method used: {option}\n{'-'*50}\n")
+                return
+            except Exception as e:
+                self.result_text.append(f"⚠ Batch prediction failed, falling back to per-symbol run: {e}\n")
+
+        if len(symbols) > 1:
+            try:
+                if option == "PEG Ratio":
+                    Prediction.fetch_peg_ratios(symbols)
+                else:
+                    Prediction.prefetch(symbols)
+            except Exception as e:
+                self.result_text.append(f"⚠ Batch download failed, falling back to per-symbol fetch: {e}\n")
+
         for symbol in symbols:
             try:
                 match option:
@@ -190,6 +280,8 @@ class PredictionWindow(QMainWindow):
                         result = Prediction.liner_regression(symbol, plot=show_graph)
                     case "PricePrediction":
                         result = Prediction.predict_next_price(symbol, plot=show_graph)
+                    case "PricePrediction (Global)":
+                        result = float(Prediction.predict_next_prices([symbol]).iloc[0])
                     case "RSI":
                         result = Prediction.predict_rsi(symbol, plot=show_graph)
                     case "Hammer search":
@@ -199,15 +291,15 @@ class PredictionWindow(QMainWindow):
                     case "EMA Cross":
                         result = Prediction.detect_ema_cross(symbol, plot=show_graph)
                     case "PEG Ratio":
-                        result = Prediction.predict_peg_ratio(symbol)
+                        result = Prediction.fetch_peg_ratio(symbol)
                     case "MACD":
-                        result = Prediction.predict_MACD(symbol, plot=show_graph)
+                        result = Prediction.plot_macd(symbol, plot=show_graph)
                     case "Binomial Prediction":
-                        result = Prediction.predict_price_binomial(symbol)
+                        result = Prediction.predict_price_binomial(symbol, plot=show_graph)
                     case "Trending":
                         result = Prediction.momentum(symbol, plot=show_graph)
                     case "Aroon":
-                        result = Prediction.predict_aroon(symbol, plot=show_graph)
+                        result = Prediction.aroon_indicator(symbol, plot=show_graph)
                     case "Sushi":
                         result = Prediction.sushiroll(symbol, plot=show_graph)
                     case "VMA":
@@ -225,3 +317,14 @@ class PredictionWindow(QMainWindow):
 
             except Exception as e:
                 self.result_text.append(f"❌ Error with {symbol}: {str(e)}\n{'-'*50}\n")
+
+    def show_batch_result(self, symbols, option, indicators):
+        latest = Prediction.latest_values(Prediction.batch_indicators(symbols, indicators))
+        for symbol in symbols:
+            if symbol not in latest.index:
+                self.result_text.append(f"❌ Error with {symbol}: no data\n{'-'*50}\n")
+                continue
+            values = latest.loc[symbol]
+            lines = "\n".join(f"{name}: {value:.2f}" for name, value in values.items())
+            self.result_text.append(f"📈 Prediction for {symbol}:\n\n{lines}")
+            self.result_text.append(f"\n🛠 Method used: {option}\n{'-'*50}\n")